@@ -2,18 +2,47 @@
 Separates building the dataset from serving it.
 
 Building runs the whole pipeline: read the workbook, clean it, fit the ridge
-model, render the charts. It needs pandas, openpyxl, scikit-learn and plotly,
-and takes the better part of a minute.
+model, lay out the chart data. It needs pandas, openpyxl and scikit-learn, and
+takes the better part of a minute.
 
 Serving needs none of that. The web app reads prebuilt parquet files and starts
 in about a second. That split is what took boot from 37s to ~2s, and it is why
 `load()` must never import the modeling stack, directly or transitively.
+
+The per-player game frames can optionally be written sorted by player instead
+(set NN_PARTITION_PLAYER_FRAMES=1 for the build). They are then left on disk at
+load, and a player page reads just its player's rows through row-group
+statistics, so boot memory stops growing with the league's history.
+
+Each build is written to a directory of its own under builds/, and a CURRENT
+file names the newest. A dataset being served keeps reading its own build's
+files, even the ones it reads lazily, however many builds land after it: a
+build is deleted only once no process has it loaded (see _prune).
+
+The ratings history lives in DuckDB, which is only ever written by the build.
+The build exports it as one more frame, sorted by player and date, so serving
+it is an indexed slice of memory rather than a database connection per request.
+
+Charts are shipped as data, not pictures. The league ratings chart used to be
+rendered by Plotly into several megabytes of HTML on every build, after
+grouping the whole history in pandas; now the build writes its series once as
+compact JSON, and the browser draws it. The Plotly HTML can still be rendered,
+as an opt-in stage (set NN_PLOTLY_HTML=1 for the build), for a classic site
+that wants its original server-drawn charts.
+
+The player page's rolling averages are served from running totals the build
+stores per player (see rolling_sums), so a window of any length is a
+subtraction rather than a fresh pass over the player's games. Their splits
+tab is likewise read from a frame the build computes for every player at once
+(see splits.py).
 """
 
 import hashlib
 import json
 import logging
+import os
 import shutil
+import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
@@ -21,13 +50,19 @@ from typing import IO, Optional, Union
 
 import polars as pl
 
+try:
+    import fcntl
+except ImportError:  # Windows: builds are kept by age instead (see _prune)
+    fcntl = None
+
 from collective_bball.paths import artifacts_dir
+from collective_bball.splits import split_frame
 
 logger = logging.getLogger(__name__)
 
 # Bump when the set of persisted frames or their columns changes, so a deploy
 # carrying new code rebuilds instead of loading artifacts it can't understand.
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 5
 
 # Frames persisted as parquet and restored onto the loaded dataset.
 FRAMES = (
@@ -40,15 +75,75 @@ FRAMES = (
     "ratings",
     "teammates",
     "opponents",
+    "ratings_history",
+    "rolling_sums",
+    "player_splits",
 )
 
-# Chart HTML is written beside the frames and read lazily. Each blob is several
-# megabytes, so it stays out of the boot path and out of memory until the
-# classic site actually asks for it.
+# Frames that grow with every game played and are read a player at a time.
+# Teammates and opponents grow too, but they are league tables as well, read
+# whole by the warm-up and the classic home page, so on disk they would only
+# be read back into memory at boot.
+PLAYER_PARTITIONED = ("player_games", "rolling_sums")
+
+# Rows per row group when written sorted by player. A group per player made the
+# parquet footer larger than the data; at this size a player's rows span one or
+# two groups and the footer stays small.
+PARTITION_ROW_GROUP_SIZE = 8192
+
+# Each row's position before sorting by player, so reads can restore the order
+# every view was written against.
+ROW_COLUMN = "__row"
+
+# Chart data, written beside the frames as `<name>.json` and read lazily: it is
+# served as is, so it never needs to be parsed.
+CHARTS = ("ratings_history_chart",)
+
+# Chart HTML, written only by builds with NN_PLOTLY_HTML set. Each blob is
+# several megabytes, so it stays out of the boot path and out of memory until
+# the classic site actually asks for it.
 PLOTS = ("plot_ratings", "plot_rapm_apm")
 
 META_FILENAME = "meta.json"
 
+# Under artifacts_dir(): one directory per build, and the name of the newest.
+BUILDS_DIRNAME = "builds"
+CURRENT_FILENAME = "CURRENT"
+
+# Without file locks to tell which builds are still loaded, the newest this
+# many are kept.
+BUILDS_KEPT = 3
+
+# Per-game metrics the player page charts rolling averages of.
+ROLLING_METRICS = (
+    "result_vs_expectation",
+    "other_9_players_quality_diff",
+    "teammate_quality",
+    "opp_quality",
+    "winner",
+)
+
+# Day-strength columns the date page ranks each run by, against every other.
+DAY_STRENGTH_COLUMNS = ("mean_rating_player_games", "mean_rating_players")
+
+# Columns the views look rows up by, per frame. Every player page and date page
+# starts by narrowing a frame to one player or one date; with these indexed
+# that costs the rows returned rather than a scan of the whole frame.
+INDEXED_COLUMNS = {
+    "player_data": ("player",),
+    "player_games": ("player",),
+    "player_days": ("player", "game_date"),
+    "teammates": ("player",),
+    "opponents": ("player",),
+    "games": ("game_date",),
+    "days": ("game_date",),
+    "ratings_history": ("player",),
+    "rolling_sums": ("player",),
+    "player_splits": ("player",),
+    "player_ranks": ("player",),
+    "day_ranks": ("game_date",),
+}
+
 
 def default_args():
     """Pipeline arguments. Mirrors the CLI defaults in main.py."""
@@ -83,43 +178,46 @@ def source_fingerprint(source: Union[str, Path, IO, bytes]) -> str:
 def build(source: Union[str, Path, IO], args=None):
     """Run the full pipeline and return the populated BasketballData object."""
     # Imported lazily: these are the expensive dependencies the web app avoids.
-    import duckdb
-
-    from collective_bball import create_db_tables
+    from collective_bball import create_db_tables, database
     from collective_bball.basketball_data import BasketballData
     from collective_bball.moneyline_model import BettingGames
-    from collective_bball.paths import db_path
-    from collective_bball.plots import Plots
     from collective_bball.rapm_model import RAPMModel
 
     args = args or default_args()
     started = time.time()
 
-    conn = duckdb.connect(str(db_path()))
-    try:
-        create_db_tables.create_tables(conn)
-
-        data = BasketballData(data_source=source, args=args)
-        data.clean_data()
-        data.compute_clock_and_starting_poss()
-        data.compute_player_stats()
-        data.compute_fatigue()
+    data = BasketballData(data_source=source, args=args)
+    data.clean_data()
+    data.compute_clock_and_starting_poss()
+    data.compute_player_stats()
+    data.compute_fatigue()
 
-        data.compute_rapm(RAPMModel())
+    data.compute_rapm(RAPMModel())
+    # The only write. Everything after it reads the snapshot it publishes.
+    with database.writer() as conn:
+        create_db_tables.create_tables(conn)
         data.write_to_db(conn=conn)
 
-        data.merge_player_data()
+    data.merge_player_data()
 
-        betting_games = BettingGames()
-        data.compute_spreads(betting_games)
-        data.compute_moneylines(betting_games)
+    betting_games = BettingGames()
+    data.compute_spreads(betting_games)
+    data.compute_moneylines(betting_games)
 
-        data.assemble_player_data()
-        data.assemble_days_data()
+    data.assemble_player_data()
+    data.assemble_days_data()
 
-        data.plot_things(Plots(conn))
-    finally:
-        conn.close()
+    with database.reader() as conn:
+        data.ratings_history = export_ratings_history(conn)
+        if plotly_html_enabled():
+            from collective_bball.plots import Plots
+
+            data.plot_things(Plots(conn))
+    data.ratings_history_chart = ratings_history_chart(
+        data.ratings_history, data.ratings
+    )
+    data.rolling_sums = rolling_sums(data.player_games)
+    data.player_splits = split_frame(data.player_games)
 
     logger.info(
         "Built dataset in %.1fs: %d games, %d players",
@@ -130,14 +228,139 @@ def build(source: Union[str, Path, IO], args=None):
     return data
 
 
-def save(data, out_dir: Optional[Path] = None, fingerprint: str = "") -> Path:
-    """Write the dataset to parquet + JSON.
+def export_ratings_history(conn) -> pl.DataFrame:
+    """Every rating snapshot in the database, one row per player and date.
 
-    Written to a sibling staging directory and swapped into place, so a crash
-    mid-write can never leave the app booting from a half-written set.
+    Sorted by player then date, so each player's history is one contiguous,
+    already ordered run and the player index hands it back as is.
     """
-    out_dir = Path(out_dir or artifacts_dir())
-    staging = out_dir.parent / f"{out_dir.name}.staging"
+    rows = conn.execute(
+        "SELECT player, date, rating FROM ratings ORDER BY player, date"
+    ).fetchall()
+    return pl.DataFrame(
+        rows,
+        schema={"player": pl.Utf8, "date": pl.Utf8, "rating": pl.Float64},
+        orient="row",
+    )
+
+
+def ratings_history_chart(history: pl.DataFrame, ratings: pl.DataFrame) -> bytes:
+    """Every player's rating trajectory, as JSON ready to serve.
+
+    A shared date axis plus one series per player, null where the player has
+    no rating that day, which is far smaller than repeating the date on every
+    point. Ratings are rounded to the three places the charts show. Players
+    are ordered by current rating so the front end can color the leaders and
+    leave the rest as recessive context.
+    """
+    rows = (
+        history.filter(~pl.col("player").str.contains("(?i)tier"))
+        .sort(["date", "player"])
+        .rows()
+    )
+
+    dates = sorted({str(date) for _player, date, _rating in rows})
+    date_index = {date: i for i, date in enumerate(dates)}
+
+    series = {}
+    for player, date, rating in rows:
+        series.setdefault(player, [None] * len(dates))[
+            date_index[str(date)]
+        ] = round(float(rating), 3)
+
+    current = {
+        row["player"]: row["rating"]
+        for row in ratings.to_dicts()
+        if row["rating"] is not None
+    }
+    ordered = sorted(
+        series.items(),
+        key=lambda item: current.get(item[0], -99),
+        reverse=True,
+    )
+
+    return json.dumps(
+        {
+            "dates": dates,
+            "series": [{"name": name, "v": values} for name, values in ordered],
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def rolling_sums(player_games: pl.DataFrame) -> pl.DataFrame:
+    """Each player's running totals of ROLLING_METRICS, game by game.
+
+    One row per player game, in player_game_num order, holding the sum of
+    each metric over that game and every one before it. The mean over any
+    window of games is then the difference of two rows divided by the
+    window. Game rows are complete by the time they get here (the ingest
+    drops partial ones), so there are no nulls to carry.
+    """
+    return (
+        player_games.select(["player", "player_game_num", "game_date", *ROLLING_METRICS])
+        .sort(["player", "player_game_num"])
+        .with_columns(
+            pl.col(metric).cast(pl.Float64).cum_sum().over("player")
+            for metric in ROLLING_METRICS
+        )
+    )
+
+
+def plotly_html_enabled() -> bool:
+    """Whether builds also render the classic site's charts as Plotly HTML."""
+    return os.environ.get("NN_PLOTLY_HTML", "").lower() in ("1", "true", "yes")
+
+
+def partition_players_enabled() -> bool:
+    """Whether builds write PLAYER_PARTITIONED frames sorted by player."""
+    return os.environ.get("NN_PARTITION_PLAYER_FRAMES", "").lower() in ("1", "true", "yes")
+
+
+def _write_player_sorted(frame: pl.DataFrame, path: Path) -> None:
+    frame.with_row_index(ROW_COLUMN).sort("player", maintain_order=True).write_parquet(
+        path, row_group_size=PARTITION_ROW_GROUP_SIZE, statistics=True
+    )
+
+
+def _read_player_sorted(path: Path, player: Optional[str] = None) -> pl.DataFrame:
+    """A frame written by _write_player_sorted, in its original row order.
+
+    Given a player, only the row groups whose statistics can contain that
+    player are read.
+    """
+    scan = pl.scan_parquet(path)
+    if player is not None:
+        scan = scan.filter(pl.col("player") == player)
+    return scan.sort(ROW_COLUMN).drop(ROW_COLUMN).collect()
+
+
+def save(
+    data,
+    out_dir: Optional[Path] = None,
+    fingerprint: str = "",
+    partition_players: Optional[bool] = None,
+) -> Path:
+    """Write the dataset to parquet + JSON, as a new build under `out_dir`
+    (default artifacts_dir()). Returns the build's directory.
+
+    Written to a staging directory, renamed into place and only then named in
+    CURRENT, so a crash mid-write can never leave the app booting from a
+    half-written set, and a build already loaded is never written over.
+
+    With `partition_players` (default: NN_PARTITION_PLAYER_FRAMES), the
+    PLAYER_PARTITIONED frames are written sorted by player, with row-group
+    statistics, and left on disk by load().
+    """
+    root = Path(out_dir or artifacts_dir())
+    if partition_players is None:
+        partition_players = partition_players_enabled()
+    partitioned = PLAYER_PARTITIONED if partition_players else ()
+
+    built_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    build_name = _build_name(fingerprint, built_at)
+    builds = root / BUILDS_DIRNAME
+    staging = builds / f"{build_name}.staging"
     if staging.exists():
         shutil.rmtree(staging)
     staging.mkdir(parents=True)
@@ -146,16 +369,22 @@ def save(data, out_dir: Optional[Path] = None, fingerprint: str = "") -> Path:
         frame = getattr(data, name, None)
         if frame is None:
             raise ValueError(f"Cannot save artifacts: frame '{name}' is missing")
-        frame.write_parquet(staging / f"{name}.parquet")
+        if name in partitioned:
+            _write_player_sorted(frame, staging / f"{name}.parquet")
+        else:
+            frame.write_parquet(staging / f"{name}.parquet")
+
+    for name in CHARTS:
+        (staging / f"{name}.json").write_bytes(getattr(data, name))
 
     for name in PLOTS:
-        (staging / f"{name}.html").write_text(
-            getattr(data, name, "") or "", encoding="utf-8"
-        )
+        html = getattr(data, name, None)
+        if html:
+            (staging / f"{name}.html").write_text(html, encoding="utf-8")
 
     meta = {
         "schema_version": SCHEMA_VERSION,
-        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "built_at": built_at,
         "source_fingerprint": fingerprint,
         "best_lambda": data.best_lambda,
         "ingest_report": getattr(data, "ingest_report", {}),
@@ -163,20 +392,167 @@ def save(data, out_dir: Optional[Path] = None, fingerprint: str = "") -> Path:
         "num_players": data.player_data.height,
         "num_days": data.days.height,
         "latest_game_date": data.games["game_date"].max(),
+        "player_partitioned": list(partitioned),
     }
     (staging / META_FILENAME).write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
-    previous = out_dir.parent / f"{out_dir.name}.previous"
-    if previous.exists():
-        shutil.rmtree(previous)
-    if out_dir.exists():
-        out_dir.rename(previous)
-    staging.rename(out_dir)
-    if previous.exists():
-        shutil.rmtree(previous)
+    build_dir, n = builds / build_name, 1
+    while build_dir.exists():
+        # The same workbook saved twice within a second: the earlier build
+        # may be loaded already, so it is not written over.
+        n += 1
+        build_dir = builds / f"{build_name}-{n}"
+    staging.rename(build_dir)
+    current = root / f"{CURRENT_FILENAME}.tmp"
+    current.write_text(build_dir.name, encoding="utf-8")
+    os.replace(current, root / CURRENT_FILENAME)
+
+    _prune(root, keep=build_dir)
+    logger.info("Saved artifacts to %s", build_dir)
+    return build_dir
+
+
+def _build_name(fingerprint: str, built_at: str) -> str:
+    """A build's directory name: when it was built, then what from, so names
+    sort oldest first."""
+    stamp = built_at.replace(":", "").replace("-", "").replace("+0000", "Z")
+    return f"{stamp}-{(fingerprint or 'unknown')[:16]}-s{SCHEMA_VERSION}"
+
+
+def _pin(directory: Path):
+    """Mark `directory`'s build as loaded by this process, for as long as the
+    returned file stays open: a shared lock, which _prune checks for."""
+    if fcntl is None:
+        return None
+    pin = open(directory / META_FILENAME, "rb")
+    fcntl.flock(pin, fcntl.LOCK_SH)
+    return pin
+
+
+def _in_use(directory: Path) -> bool:
+    """Whether any process holds `directory`'s build loaded (see _pin)."""
+    try:
+        with open(directory / META_FILENAME, "rb") as probe:
+            try:
+                fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(probe, fcntl.LOCK_UN)
+    except FileNotFoundError:
+        # A staging directory left by a crash, or a partial delete.
+        return False
+    return False
+
+
+def _saving(path: Path) -> bool:
+    """Whether `path` is a staging directory another save may still be
+    writing. One a crash left behind is pruned after an hour."""
+    return path.suffix == ".staging" and time.time() - path.stat().st_mtime < 3600
+
+
+def _prune(root: Path, keep: Path) -> None:
+    """Delete builds no process has loaded, besides `keep`.
+
+    Each serving process holds a lock on the build it has loaded until that
+    dataset is retired, i.e. swapped out and no longer referenced by any
+    request, so a build is only removed once nothing can read from it.
+    Without file locks the newest BUILDS_KEPT builds are kept instead.
+    Files from the single-directory layout before builds/ are removed too.
+    """
+    builds = sorted(
+        p for p in (root / BUILDS_DIRNAME).iterdir()
+        if p.is_dir() and not _saving(p)
+    )
+    if fcntl is None:
+        stale = [p for p in builds[:-BUILDS_KEPT] if p != keep]
+    else:
+        stale = [p for p in builds if p != keep and not _in_use(p)]
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+
+    for legacy in root.iterdir():
+        if legacy.is_file() and legacy.suffix in (".parquet", ".html", ".json"):
+            legacy.unlink(missing_ok=True)
+
+
+def current_build(root: Optional[Path] = None) -> Optional[Path]:
+    """The newest build's directory, or None before the first build."""
+    root = Path(root or artifacts_dir())
+    try:
+        name = (root / CURRENT_FILENAME).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return root / BUILDS_DIRNAME / name if name else None
+
+
+class RowIndex:
+    """Row positions in a frame, grouped by the value of one column.
 
-    logger.info("Saved artifacts to %s", out_dir)
-    return out_dir
+    Positions are stored in key order with each key's rows contiguous, plus
+    the offset and length of every key's run. Rows keep their original
+    relative order within a key, so a lookup returns exactly what filtering on
+    the column would, without reading the rest of the frame.
+    """
+
+    def __init__(self, frame: pl.DataFrame, column: str):
+        ordered = frame.select(
+            pl.col(column), pl.int_range(pl.len(), dtype=pl.UInt32).alias("row")
+        ).sort(column, maintain_order=True, nulls_last=True)
+        self._rows = ordered["row"]
+
+        self._spans = {}
+        start = 0
+        for key, length in ordered.group_by(column, maintain_order=True).len().iter_rows():
+            # Equality never matches null, so neither does a lookup.
+            if key is not None:
+                self._spans[key] = (start, length)
+            start += length
+
+    def take(self, frame: pl.DataFrame, value) -> pl.DataFrame:
+        span = self._spans.get(value)
+        if span is None:
+            return frame.clear()
+        return frame[self._rows.slice(*span)]
+
+
+def rank_frames(player_data: pl.DataFrame, days: pl.DataFrame) -> dict:
+    """Ranks and neighbours the player and date pages show, so that viewing
+    one is a row lookup rather than a sort of the whole league.
+
+    `player_ranks`: each individually rated player's rating rank (1 = best,
+    ties share the higher rank) and how many players are rated. Tiered
+    players share their tier's estimate and are left out.
+
+    `day_ranks`: each game date's previous and next date, and for every
+    DAY_STRENGTH_COLUMNS column its rank, the number of runs ranked, and
+    where it falls from 0 (worst) to 1 (best), null with fewer than two.
+    """
+    rated = player_data.filter(pl.col("tiered_rating") == 0)
+    player_ranks = rated.select(
+        "player",
+        pl.col("rating").rank("min", descending=True).alias("rating_rank"),
+        pl.lit(rated.height).alias("rating_total"),
+    )
+
+    columns = [
+        pl.col("game_date"),
+        pl.col("game_date").shift(1).alias("prev_date"),
+        pl.col("game_date").shift(-1).alias("next_date"),
+    ]
+    for column in DAY_STRENGTH_COLUMNS:
+        if column not in days.columns:
+            continue
+        total = days[column].count()
+        rank = pl.col(column).rank("min", descending=True)
+        pct = (total - rank) / (total - 1) if total >= 2 else pl.lit(None, pl.Float64)
+        columns += [
+            rank.alias(f"{column}_rank"),
+            pl.lit(total).alias(f"{column}_total"),
+            pct.alias(f"{column}_pct"),
+        ]
+    day_ranks = days.sort("game_date").select(columns)
+
+    return {"player_ranks": player_ranks, "day_ranks": day_ranks}
 
 
 class LoadedData:
@@ -184,10 +560,19 @@ class LoadedData:
 
     Exposes the same attribute names as BasketballData so the views, the
     formatters and the classic site all work against either one.
+
+    Frames written sorted by player stay on disk. Looking one up by player
+    reads only that player's rows; touching the attribute itself reads the
+    whole frame, once. Like the chart data, they are read from this build's
+    own directory, which stays put, and pinned against pruning, for as long
+    as this object lives.
+
+    The ranks the pages show are derived once here, on load (see rank_frames).
     """
 
     def __init__(self, directory: Path, meta: dict, frames: dict):
         self._dir = directory
+        self._pin = _pin(directory)
         self.meta = meta
         self.best_lambda = meta.get("best_lambda")
         self.ingest_report = meta.get("ingest_report", {})
@@ -195,6 +580,47 @@ class LoadedData:
         self.source_fingerprint = meta.get("source_fingerprint", "")
         for name, frame in frames.items():
             setattr(self, name, frame)
+        self._on_disk = set(meta.get("player_partitioned", ())) - set(frames)
+        for name, frame in rank_frames(self.player_data, self.days).items():
+            setattr(self, name, frame)
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        # Only reached when normal lookup fails, i.e. for a frame still on disk.
+        if name not in self.__dict__.get("_on_disk", ()):
+            raise AttributeError(name)
+        with self._load_lock:
+            if name not in self.__dict__:
+                setattr(self, name, _read_player_sorted(self._dir / f"{name}.parquet"))
+                logger.info("Read %s into memory", name)
+        return self.__dict__[name]
+
+    def rows_for(self, frame: str, column: str, value) -> pl.DataFrame:
+        """Rows of `frame` where `column` equals `value`.
+
+        Same result as `.filter(pl.col(column) == value)`. Indexes are built on
+        first use and live as long as this dataset, i.e. once per version.
+        """
+        if column == "player" and frame in self._on_disk and frame not in self.__dict__:
+            return _read_player_sorted(self._dir / f"{frame}.parquet", player=value)
+
+        if column not in INDEXED_COLUMNS.get(frame, ()):
+            return getattr(self, frame).filter(pl.col(column) == value)
+
+        index = self._indexes.get((frame, column))
+        if index is None:
+            with self._index_lock:
+                index = self._indexes.get((frame, column))
+                if index is None:
+                    index = RowIndex(getattr(self, frame), column)
+                    self._indexes[(frame, column)] = index
+        return index.take(getattr(self, frame), value)
+
+    def chart(self, name: str) -> bytes:
+        """The JSON for one of CHARTS, as written by the build."""
+        return (self._dir / f"{name}.json").read_bytes()
 
     def _read_plot(self, name: str) -> str:
         path = self._dir / f"{name}.html"
@@ -209,19 +635,23 @@ class LoadedData:
         return self._read_plot("plot_rapm_apm")
 
 
-def read_meta(directory: Optional[Path] = None) -> dict:
-    """Just the metadata, without reading any parquet.
+def read_meta(root: Optional[Path] = None) -> dict:
+    """Just the newest build's metadata, without reading any parquet.
 
     Cheap enough to poll, which is how a running server notices that another
     process rebuilt the dataset underneath it.
     """
-    directory = Path(directory or artifacts_dir())
+    directory = current_build(root)
+    if directory is None:
+        raise FileNotFoundError("No artifacts have been built yet")
     return json.loads((directory / META_FILENAME).read_text(encoding="utf-8"))
 
 
-def is_current(directory: Optional[Path] = None) -> bool:
-    """True when a complete artifact set matching this code version exists."""
-    directory = Path(directory or artifacts_dir())
+def is_current(root: Optional[Path] = None) -> bool:
+    """True when a complete newest build matching this code version exists."""
+    directory = current_build(root)
+    if directory is None:
+        return False
     meta_file = directory / META_FILENAME
     if not meta_file.exists():
         return False
@@ -231,17 +661,24 @@ def is_current(directory: Optional[Path] = None) -> bool:
         return False
     if meta.get("schema_version") != SCHEMA_VERSION:
         return False
-    return all((directory / f"{name}.parquet").exists() for name in FRAMES)
+    return all(
+        (directory / f"{name}.parquet").exists() for name in FRAMES
+    ) and all((directory / f"{name}.json").exists() for name in CHARTS)
 
 
-def load(directory: Optional[Path] = None) -> LoadedData:
-    """Read a prebuilt dataset. Cheap: parquet only, no modeling imports."""
-    directory = Path(directory or artifacts_dir())
+def load(root: Optional[Path] = None) -> LoadedData:
+    """Read the newest build. Cheap: parquet only, no modeling imports."""
+    directory = current_build(root)
+    if directory is None:
+        raise FileNotFoundError("No artifacts have been built yet")
     started = time.time()
 
     meta = json.loads((directory / META_FILENAME).read_text(encoding="utf-8"))
+    on_disk = set(meta.get("player_partitioned", ()))
     frames = {
-        name: pl.read_parquet(directory / f"{name}.parquet") for name in FRAMES
+        name: pl.read_parquet(directory / f"{name}.parquet")
+        for name in FRAMES
+        if name not in on_disk
     }
 
     logger.info(
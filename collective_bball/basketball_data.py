@@ -10,8 +10,11 @@ from collective_bball.etl import (
 from collective_bball.player_data import PlayerData
 from collective_bball.rapm_model import RAPMModel
 from collective_bball.moneyline_model import BettingGames
-from collective_bball.plots import Plots
-from typing import Tuple, List, Union, IO
+from typing import TYPE_CHECKING, Tuple, List, Union, IO
+
+if TYPE_CHECKING:
+    # Plotly is only imported by builds that render the chart HTML.
+    from collective_bball.plots import Plots
 
 # Minimum games in a day to be eligible for that day's MVP or LVP, so one
 # lucky or unlucky game cannot take the award.
@@ -396,7 +399,7 @@ class BasketballData:
 
         return days, days_of_week
 
-    def plot_things(self, plots: Plots):
+    def plot_things(self, plots: "Plots"):
 
         self.plot_ratings = plots.plot_ratings_time()
         self.plot_rapm_apm = plots.plot_rapm_vs_apm(player_data=self.player_data)
@@ -0,0 +1,127 @@
+"""
+DuckDB access: one short-lived writer, any number of concurrent readers.
+
+DuckDB allows a single read-write handle per file, across processes. The web
+app used to open that handle for every read too, one request at a time behind
+a lock, so a slow query or a rebuild writing its snapshot held up every chart
+on the site.
+
+Writes now go through `writer()`, held only for the statements that insert a
+build's ratings snapshot. When the block completes it checkpoints and
+publishes a copy of the database as a read-only snapshot. Reads go through
+`reader()`, which hands out a cursor on a read-only connection to the newest
+snapshot. Cursors run their queries in parallel, and since readers never open
+the database file itself, they never hold the lock a CLI rebuild —
+`python -m collective_bball.main` — needs to write it.
+
+Each snapshot is written under a new name rather than replaced in place.
+Within a process DuckDB shares one open instance per path, so a file replaced
+under the same name would go unnoticed for as long as any reader held the old
+one.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Tuple
+
+import duckdb
+
+from collective_bball.paths import db_path, db_snapshot_dir
+
+logger = logging.getLogger(__name__)
+
+# The snapshot being read and the one before it, which readers that started
+# before the latest write may still have open.
+SNAPSHOTS_KEPT = 2
+
+SNAPSHOT_GLOB = "ratings-*.duckdb"
+
+_write_lock = threading.Lock()
+_read_lock = threading.Lock()
+_reader: Optional[Tuple[Path, duckdb.DuckDBPyConnection]] = None
+
+
+def latest_snapshot() -> Optional[Path]:
+    # Named by creation time in nanoseconds, so name order is age order.
+    snapshots = sorted(db_snapshot_dir().glob(SNAPSHOT_GLOB))
+    return snapshots[-1] if snapshots else None
+
+
+@contextmanager
+def writer():
+    """Exclusive read-write connection to the database.
+
+    Opened and closed per use, never held: a long-lived handle keeps the file
+    locked and a rebuild from the CLI fails with "Could not set lock on file"
+    for as long as any server is running. Publishes a new snapshot for readers
+    when the block completes without raising.
+    """
+    with _write_lock:
+        conn = duckdb.connect(str(db_path()))
+        try:
+            yield conn
+            _publish(conn)
+        finally:
+            conn.close()
+
+
+def _publish(conn: duckdb.DuckDBPyConnection) -> Path:
+    directory = db_snapshot_dir()
+    path = directory / f"ratings-{time.time_ns()}.duckdb"
+    staging = path.with_name(path.name + ".tmp")
+
+    catalog = conn.execute("SELECT current_database()").fetchone()[0]
+    conn.execute("CHECKPOINT")
+    conn.execute("ATTACH '%s' AS snapshot" % str(staging).replace("'", "''"))
+    try:
+        conn.execute('COPY FROM DATABASE "%s" TO snapshot' % catalog.replace('"', '""'))
+    finally:
+        conn.execute("DETACH snapshot")
+    os.replace(staging, path)
+
+    for stale in sorted(directory.glob(SNAPSHOT_GLOB))[:-SNAPSHOTS_KEPT]:
+        # Readers holding a stale snapshot keep reading it; on Windows the
+        # delete fails instead, and the next publish tries again.
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+    logger.info("Published database snapshot %s", path.name)
+    return path
+
+
+@contextmanager
+def reader():
+    """A read-only cursor on the newest snapshot, for the duration of one use."""
+    cursor = _reader_connection().cursor()
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+
+
+def _reader_connection() -> duckdb.DuckDBPyConnection:
+    global _reader
+
+    path = latest_snapshot()
+    if path is None:
+        # First read against a database that predates snapshots, or a fresh
+        # volume: publish one. Creating the tables makes an empty database
+        # readable too.
+        from collective_bball.create_db_tables import create_tables
+
+        with writer() as conn:
+            create_tables(conn)
+        path = latest_snapshot()
+
+    with _read_lock:
+        if _reader is None or _reader[0] != path:
+            # The previous connection is dropped, not closed: cursors handed
+            # out from it may still be running, and it closes once they're done.
+            _reader = (path, duckdb.connect(str(path), read_only=True))
+        return _reader[1]
@@ -24,14 +24,23 @@ SEED_DB_PATH = REPO_ROOT / "bball_database.duckdb"
 STATIC_DIR = REPO_ROOT / "flask_app" / "static"
 
 
+PLAYER_PHOTOS_DIR = STATIC_DIR / "player_pics"
+PLAYER_THUMBS_DIR = STATIC_DIR / "player_pics_thumbs"
+# Photos resized for the player pages' srcset.
+PLAYER_SIZED_DIR = STATIC_DIR / "player_pics_sized"
+
+# Written by utils/make_player_thumbnails.py; see player_images.py.
+PLAYER_IMAGE_MANIFEST = STATIC_DIR / "player_pics_manifest.json"
+
+
 def player_thumb_path(player_name: str) -> Path:
     """Small round avatar used in tables."""
-    return STATIC_DIR / "player_pics_thumbs" / f"{player_name}.webp"
+    return PLAYER_THUMBS_DIR / f"{player_name}.webp"
 
 
 def player_photo_path(player_name: str) -> Path:
     """Full-size photo used on player pages."""
-    return STATIC_DIR / "player_pics" / f"{player_name}.png"
+    return PLAYER_PHOTOS_DIR / f"{player_name}.png"
 
 
 def data_dir() -> Path:
@@ -76,6 +85,28 @@ def artifacts_dir() -> Path:
     return path
 
 
+def payload_cache_dir() -> Path:
+    """Serialized API payloads kept across restarts. Safe to delete at any time."""
+    return data_dir() / "payload_cache"
+
+
+def classic_pages_dir() -> Path:
+    """Pre-rendered classic site pages. Safe to delete at any time."""
+    return data_dir() / "classic_pages"
+
+
+def row_manifest_dir() -> Path:
+    """Per-build row hashes the table delta API diffs against. See delta.py."""
+    return data_dir() / "row_manifests"
+
+
+def db_snapshot_dir() -> Path:
+    """Read-only copies of the DuckDB database, one per write. See database.py."""
+    path = data_dir() / "db_snapshots"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 def token_path() -> Path:
     """Where the rotating OneDrive refresh token is persisted."""
     return data_dir() / "onedrive_token.json"
@@ -0,0 +1,176 @@
+"""
+Which players have pictures, and where they are, without asking the disk.
+
+Tables, the search, the scatter chart and both sites' player pages each used
+to call Path.exists() per player to decide between a picture and initials,
+several of them on every request. utils/make_player_thumbnails.py now writes a
+manifest beside the pictures instead: for each player, the path, dimensions
+and a content hash of their thumbnail and photo, and of each smaller copy of
+the photo it made for srcset. The app reads it once, and reads it again only
+when the file changes, which is checked at most every RECHECK_SECONDS.
+
+The hashes name each picture's content, so image URLs carry one (`?v=`) and
+can be cached by browsers for a year (see app.py); a new photo gets a new URL.
+
+Without a manifest (a checkout where the script hasn't been run) the two
+picture directories are listed once instead. That costs one pass over the
+files, and pages get the original photos only: sizes and resized copies come
+from the script, which needs Pillow.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from collective_bball.paths import (
+    PLAYER_IMAGE_MANIFEST,
+    PLAYER_PHOTOS_DIR,
+    PLAYER_THUMBS_DIR,
+    STATIC_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+RECHECK_SECONDS = 10
+
+PHOTO_SUFFIXES = {".png", ".jpg", ".jpeg"}
+
+
+def describe(path: Path, with_size: bool = True) -> dict:
+    """One picture's manifest entry. Paths are relative to the static folder."""
+    entry = {
+        "path": path.relative_to(STATIC_DIR).as_posix(),
+        "hash": hashlib.sha1(path.read_bytes()).hexdigest()[:12],
+    }
+    if with_size:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            entry["width"], entry["height"] = img.size
+    return entry
+
+
+def _scan_folders() -> Dict[str, dict]:
+    """Every player photo and thumbnail on disk, for want of a manifest."""
+    players: Dict[str, dict] = {}
+    sources = [
+        ("photo", PLAYER_PHOTOS_DIR, PHOTO_SUFFIXES),
+        ("thumb", PLAYER_THUMBS_DIR, {".webp"}),
+    ]
+    for kind, directory, suffixes in sources:
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.iterdir()):
+            if path.suffix.lower() in suffixes:
+                players.setdefault(path.stem, {})[kind] = describe(path, with_size=False)
+    return players
+
+
+def read_manifest(path: Path = PLAYER_IMAGE_MANIFEST) -> Optional[Dict[str, dict]]:
+    """The players in a manifest, or None if it is missing, unreadable or
+    from another version (rerun make_player_thumbnails.py)."""
+    try:
+        manifest = json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not read %s: %s", path, exc)
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest.get("players")
+
+
+def write_manifest(players: Dict[str, dict], path: Path = PLAYER_IMAGE_MANIFEST) -> None:
+    """Save `{name: {"photo": {...}, "thumb": {...}}}`. Each picture is
+    `{"path", "hash", "width", "height"}`; a photo also lists its resized
+    copies as `"variants"`, each a picture plus its `"format"`."""
+    manifest = {"version": MANIFEST_VERSION, "players": players}
+    staging = path.with_suffix(".tmp")
+    staging.write_text(json.dumps(manifest, indent=1, sort_keys=True) + "\n")
+    os.replace(staging, path)
+
+
+class PlayerImages:
+    """The manifest, kept current. Safe to share between request threads."""
+
+    def __init__(self, path: Path = PLAYER_IMAGE_MANIFEST):
+        self.path = Path(path)
+        self._players: Optional[Dict[str, dict]] = None
+        self._hashes: Optional[Dict[str, str]] = None
+        self._stamp: Optional[int] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _current(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        if self._players is not None and now - self._checked < RECHECK_SECONDS:
+            return self._players
+        with self._lock:
+            if self._players is not None and now - self._checked < RECHECK_SECONDS:
+                return self._players
+            try:
+                stamp = self.path.stat().st_mtime_ns
+            except OSError:
+                stamp = None
+            if self._players is None or stamp != self._stamp:
+                self._players = self._load(stamp)
+                self._hashes = None
+                self._stamp = stamp
+            self._checked = now
+            return self._players
+
+    def _load(self, stamp: Optional[int]) -> Dict[str, dict]:
+        players = read_manifest(self.path) if stamp is not None else None
+        if players is None:
+            logger.info("No usable player image manifest; listing the picture folders")
+            return _scan_folders()
+        return players
+
+    @property
+    def revision(self) -> Optional[int]:
+        """Changes whenever the manifest is reloaded."""
+        self._current()
+        return self._stamp
+
+    def thumb(self, player: str) -> Optional[dict]:
+        return self._current().get(player, {}).get("thumb")
+
+    def photo(self, player: str) -> Optional[dict]:
+        return self._current().get(player, {}).get("photo")
+
+    def photo_variants(self, player: str, fmt: str) -> List[dict]:
+        """The resized copies of a player's photo in `fmt`, smallest first."""
+        photo = self.photo(player) or {}
+        return [v for v in photo.get("variants", ()) if v["format"] == fmt]
+
+    def has_thumb(self, player: str) -> bool:
+        return self.thumb(player) is not None
+
+    def has_photo(self, player: str) -> bool:
+        return self.photo(player) is not None
+
+    def thumb_hashes(self) -> Dict[str, str]:
+        """Every player with a thumbnail, and its content hash. Embedded in
+        every page, so kept until the manifest changes."""
+        players = self._current()
+        hashes = self._hashes
+        if hashes is None:
+            hashes = {
+                name: images["thumb"]["hash"]
+                for name, images in players.items()
+                if "thumb" in images
+            }
+            self._hashes = hashes
+        return hashes
+
+
+# The process's one view of the manifest.
+player_images = PlayerImages()
@@ -82,7 +82,7 @@ class Plots:
     def plot_player_ratings_time(self, player_name: str):
         # Fetch data from DuckDB and convert it to Polars
         df_pandas = self.conn.execute(
-            f"SELECT * FROM ratings WHERE player = '{player_name}'"
+            "SELECT * FROM ratings WHERE player = ?", [player_name]
         ).fetch_df()
 
         df_pandas = df_pandas.sort_values(by=["date"], ascending=[True])
@@ -1,57 +1,145 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 from pathlib import Path
-from PIL import Image
-
-# Adjust these to match your actual paths
-# Example assumes:
-#   naismith_nerds/
-#     flask_app/
-#       static/
-#         player_pics/         <-- full-size PNGs live here
-#         player_pics_thumbs/  <-- we'll create this for WebP thumbs
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
-SOURCE_DIR = PROJECT_ROOT / "flask_app" / "static" / "player_pics"
-THUMB_DIR = PROJECT_ROOT / "flask_app" / "static" / "player_pics_thumbs"
-
-# Thumbnail settings
-THUMB_SIZE = (40, 40)  # this matches your 30x30 display with a bit of buffer
-WEBP_QUALITY = 80  # 0–100; 80 is a good balance
-
-
-def make_thumbnail(src_path: Path, dst_dir: Path) -> None:
-    """Create a WebP thumbnail for a single image."""
-    dst_dir.mkdir(parents=True, exist_ok=True)
-    dst_path = dst_dir / f"{src_path.stem}.webp"
-
-    # Skip if thumbnail already exists and is newer than source
-    if dst_path.exists() and dst_path.stat().st_mtime >= src_path.stat().st_mtime:
-        print(f"Skipping (up to date): {dst_path.name}")
-        return
+from typing import Dict, Optional, Tuple
 
+from PIL import Image, features
+
+from collective_bball.paths import (
+    PLAYER_IMAGE_MANIFEST,
+    PLAYER_PHOTOS_DIR,
+    PLAYER_SIZED_DIR,
+    PLAYER_THUMBS_DIR,
+    STATIC_DIR,
+)
+from collective_bball.player_images import (
+    PHOTO_SUFFIXES,
+    describe,
+    read_manifest,
+    write_manifest,
+)
+
+# Run after adding or replacing anything in player_pics/:
+#
+#     python -m collective_bball.utils.make_player_thumbnails
+#
+# For every photo it writes
+#   player_pics_thumbs/<name>.webp            <-- the avatar in tables and search
+#   player_pics_sized/<name>-<size>.<format>  <-- srcset candidates for player pages
+# and then the manifest the app reads to find them (see player_images.py).
+# Photos are worked on in parallel, one process each, and a photo whose
+# content hasn't changed since the last run is skipped.
+
+# Every size is a bounding box: the image is shrunk to fit inside it, never
+# enlarged, so a small original only gets the sizes below it.
+THUMB_SIZE = 40  # this matches your 30x30 display with a bit of buffer
+PHOTO_SIZES = (96, 256, 512)  # the hero photo is 132px tall; 2x and 3x screens need more
+
+# Encoder settings per format, listed in the order browsers should prefer them.
+FORMATS = {
+    "avif": {"quality": 55},  # roughly WebP 80's look at half the bytes
+    "webp": {"quality": 80, "method": 6},  # 0–100; 80 is a good balance
+}
+
+
+def _content_hash(path: Path) -> str:
+    # Matches the "hash" describe() records, so the two can be compared.
+    return hashlib.sha1(path.read_bytes()).hexdigest()[:12]
+
+
+def _shrink(img: Image.Image, size: int) -> Image.Image:
+    copy = img.copy()
+    copy.thumbnail((size, size), Image.LANCZOS)
+    return copy
+
+
+def render(src_path: Path, formats: Tuple[str, ...]) -> Tuple[str, dict]:
+    """Make every size of one photo. Runs in a worker process."""
+    name = src_path.stem
     with Image.open(src_path) as img:
         # Convert to RGBA to avoid issues with palettes / modes
         img = img.convert("RGBA")
-        img.thumbnail(THUMB_SIZE, Image.LANCZOS)
-        img.save(dst_path, "WEBP", quality=WEBP_QUALITY, method=6)
-        print(f"Created thumbnail: {dst_path.name}")
+
+        thumb_path = PLAYER_THUMBS_DIR / f"{name}.webp"
+        _shrink(img, THUMB_SIZE).save(thumb_path, "WEBP", **FORMATS["webp"])
+
+        variants = []
+        for size in PHOTO_SIZES:
+            if size >= max(img.size):
+                break
+            resized = _shrink(img, size)
+            for fmt in formats:
+                path = PLAYER_SIZED_DIR / f"{name}-{size}.{fmt}"
+                resized.save(path, fmt.upper(), **FORMATS[fmt])
+                variants.append({**describe(path), "format": fmt})
+
+    photo = describe(src_path)
+    photo["variants"] = variants
+    return name, {"photo": photo, "thumb": describe(thumb_path)}
+
+
+def _up_to_date(entry: Optional[dict], src_path: Path, formats: Tuple[str, ...]) -> bool:
+    """Whether the last run's output for this photo can be kept as is."""
+    if not entry or "photo" not in entry or "thumb" not in entry:
+        return False
+    photo = entry["photo"]
+    if photo.get("hash") != _content_hash(src_path):
+        return False
+    if {v["format"] for v in photo.get("variants", ())} - set(formats):
+        return False
+    outputs = [entry["thumb"]] + photo.get("variants", [])
+    return all((STATIC_DIR / output["path"]).exists() for output in outputs)
 
 
 def main() -> None:
-    if not SOURCE_DIR.exists():
-        raise SystemExit(f"Source directory does not exist: {SOURCE_DIR}")
+    if not PLAYER_PHOTOS_DIR.exists():
+        raise SystemExit(f"Source directory does not exist: {PLAYER_PHOTOS_DIR}")
+    PLAYER_THUMBS_DIR.mkdir(parents=True, exist_ok=True)
+    PLAYER_SIZED_DIR.mkdir(parents=True, exist_ok=True)
 
-    image_files = [
-        p for p in SOURCE_DIR.iterdir() if p.suffix.lower() in {".png", ".jpg", ".jpeg"}
-    ]
+    formats = tuple(fmt for fmt in FORMATS if features.check(fmt))
+    for fmt in FORMATS:
+        if fmt not in formats:
+            print(f"This Pillow can't write {fmt.upper()}; skipping that format")
 
+    image_files = sorted(
+        p for p in PLAYER_PHOTOS_DIR.iterdir() if p.suffix.lower() in PHOTO_SUFFIXES
+    )
     if not image_files:
-        print(f"No images found in {SOURCE_DIR}")
-        return
+        print(f"No images found in {PLAYER_PHOTOS_DIR}")
+    else:
+        print(f"Found {len(image_files)} images in {PLAYER_PHOTOS_DIR}")
+
+    previous = read_manifest() or {}
+    players: Dict[str, dict] = {}
+    todo = []
+    for src_path in image_files:
+        entry = previous.get(src_path.stem)
+        if _up_to_date(entry, src_path, formats):
+            players[src_path.stem] = entry
+        else:
+            todo.append(src_path)
+    print(f"Skipping {len(players)} unchanged, resizing {len(todo)}")
+
+    with ProcessPoolExecutor() as pool:
+        for name, entry in pool.map(render, todo, [formats] * len(todo)):
+            players[name] = entry
+            print(f"Created {len(entry['photo']['variants']) + 1} images for {name}")
 
-    print(f"Found {len(image_files)} images in {SOURCE_DIR}")
-    for img_path in image_files:
-        make_thumbnail(img_path, THUMB_DIR)
+    # Sizes of photos since removed or replaced by a smaller original.
+    kept = {
+        variant["path"]
+        for entry in players.values()
+        for variant in entry["photo"]["variants"]
+    }
+    for path in PLAYER_SIZED_DIR.iterdir():
+        if path.relative_to(STATIC_DIR).as_posix() not in kept:
+            path.unlink()
 
-    print("Done generating thumbnails.")
+    # The app decides who has a picture from this, not from the folders, so
+    # it must be rewritten whenever a picture is added or replaced.
+    write_manifest(players)
+    print(f"Wrote {PLAYER_IMAGE_MANIFEST.name} ({len(players)} players)")
 
 
 if __name__ == "__main__":
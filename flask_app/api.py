@@ -5,22 +5,66 @@ Payloads are column-oriented: one spec describing the columns, then rows as
 plain arrays. Repeating a key on every row, as a list of objects would, roughly
 triples the size of the larger tables for no benefit.
 
-Serialized payloads are cached per dataset per data version and gzipped, so a
-tab that has been opened once is served straight from memory. The cache is
-keyed on DataStore.version, so a hot swap invalidates everything at once.
+Serialized payloads are cached per dataset per data version, so a tab that has
+been opened once is served straight from memory. The cache is keyed on
+DataStore.version, so a hot swap invalidates everything at once, and concurrent
+misses for one key share a single build (see payload_cache.py).
+
+League tables can also be asked for a page at a time, sorted and filtered on
+the server (see table_query.py); each distinct query is cached the same way.
+The page each table asks for first is also warmed and kept on disk, so the
+first load after a swap or a restart isn't a cold sort on the request thread.
+
+Every frame endpoint can answer in Arrow IPC instead of JSON, for `?format=arrow`
+or an Accept header preferring application/vnd.apache.arrow.stream.
+
+Whole league tables can be streamed with `?stream=1`: encoded, compressed and
+sent a batch of rows at a time instead of as one buffered payload. A client
+holding a table from an earlier build can ask for just the rows that changed
+with `?since=<build>` (see delta.py).
+
+Pages call all of these under /api/v/<build>/, which names the build and can
+be cached indefinitely (see `versioned`).
 """
 
+import datetime
 import gzip
 import hashlib
+import io
 import json
 import logging
-from typing import Callable, Dict
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote
 
 import polars as pl
-from flask import Blueprint, Response, current_app, jsonify, request
-
-from collective_bball.paths import player_thumb_path
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    jsonify,
+    redirect,
+    request,
+    stream_with_context,
+)
+from werkzeug.exceptions import HTTPException
+
+from collective_bball.player_images import player_images
+from collective_bball.splits import SPLIT_COLUMNS, SPLIT_KINDS
+from flask_app import delta
 from flask_app.columns import label_for, round_floats, spec_for, type_for
+from flask_app.downsample import (
+    DEFAULT_POINTS,
+    MAX_POINTS,
+    MIN_POINTS,
+    downsample,
+    window,
+)
+from flask_app.payload_cache import namespace_for
+from flask_app.search_index import DEFAULT_RESULTS, MAX_RESULTS, SearchIndex
+from flask_app.table_query import QueryError, TableQuery, first_page_key, is_query
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +73,15 @@ api = Blueprint("api", __name__, url_prefix="/api")
 # Below this size, gzip costs more than it saves.
 GZIP_MIN_BYTES = 1024
 
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+# Below this many rows, frames are encoded a row at a time (see _json_rows).
+SMALL_FRAME_ROWS = 200
+
+# Rows encoded per chunk of a streamed table. A few hundred KB of JSON on the
+# widest tables, and few enough chunks that per-chunk overhead doesn't show.
+STREAM_BATCH_ROWS = 5000
+
 # Columns that exist to drive the model, not to be read in a table.
 _GAME_INTERNALS = [
     "winning_score",
@@ -110,10 +163,16 @@ def _player_days(data) -> pl.DataFrame:
 
 
 def _teammates(data) -> pl.DataFrame:
+    """One row per pairing. Each pair appears once from either player's side,
+    a rounding error apart; keep the alphabetically first player's, so every
+    build shows the same row and a delta doesn't report the pair as changed."""
+    pairs = data.teammates.sort("player", maintain_order=True).unique(
+        "pairing", keep="first", maintain_order=True
+    )
     return _order(
-        data.teammates.drop(["player", "teammate"]).unique("pairing"),
+        pairs.drop(["player", "teammate"]),
         ["pairing", "games_played", "wins", "losses", "win_pct"],
-    ).sort(["games_played", "win_pct"], descending=[True, True])
+    ).sort(["games_played", "win_pct"], descending=[True, True], maintain_order=True)
 
 
 def _opponents(data) -> pl.DataFrame:
@@ -142,42 +201,234 @@ DATASETS: Dict[str, Callable] = {
     "days_of_week": _days_of_week,
 }
 
+# What each league table asks for when it first loads: nn-table.js's PAGE rows,
+# sorted descending by the table's data-sort in index.html. Keep in step.
+FIRST_PAGE_ROWS = 200
+FIRST_PAGE_SORT: Dict[str, str] = {
+    "stats": "wins",
+    "ratings": "rating",
+    "games": "game_date",
+    "player_days": "game_date",
+    "teammates": "games_played",
+    "opponents": "games_played",
+    "days": "game_date",
+}
+
+# Rounded league-table frames for the version being served, by table name.
+_frames: Dict[str, Tuple[int, pl.DataFrame]] = {}
+_frames_lock = threading.Lock()
+
+# The header search's index for the version being served:
+# (version, picture manifest revision, index).
+_search_index: Optional[Tuple[int, Optional[int], SearchIndex]] = None
+_search_index_lock = threading.Lock()
+
 
 # -- serialisation ---------------------------------------------------------
 
-def _serialize(df: pl.DataFrame) -> bytes:
+def _json_literal(name: str, dtype) -> pl.Expr:
+    """Each value of a column as the JSON text that encodes it.
+
+    Numbers and booleans are cast, which is what json.dumps would print.
+    Floats that JSON can't represent (NaN, inf) become null rather than the
+    bare NaN json.dumps emits and browsers refuse to parse. Everything else
+    goes through Polars' own JSON encoder, which handles the escaping.
+    """
+    col = pl.col(name)
+    if dtype in (pl.Float32, pl.Float64):
+        literal = pl.when(col.is_finite()).then(col.cast(pl.Utf8)).otherwise(pl.lit("null"))
+    elif dtype.is_integer() or dtype == pl.Boolean:
+        literal = col.cast(pl.Utf8).fill_null("null")
+    else:
+        # Encoded as {"v":...}; keep the part after the key.
+        literal = (
+            pl.struct(col.alias("v")).struct.json_encode().str.slice(5).str.strip_suffix("}")
+        )
+    return literal.alias(name)
+
+
+def _json_literals(df: pl.DataFrame) -> pl.DataFrame:
+    return df.select(_json_literal(name, dtype) for name, dtype in df.schema.items())
+
+
+def _json_object(head: dict, body: str, tail: dict) -> bytes:
+    """`head`, then `body` spliced in verbatim, then `tail`, as one object."""
+    parts = [json.dumps(head, separators=(",", ":"), default=str)[:-1], body]
+    parts += [",%s:%s" % (json.dumps(key), json.dumps(value)) for key, value in tail.items()]
+    return ("".join(parts) + "}").encode("utf-8")
+
+
+def _serialize(df: pl.DataFrame, **extra) -> bytes:
+    """`{"cols", "rows", "count"}`, encoded a column at a time.
+
+    Building a Python list per row and a Python object per cell made this the
+    slowest step of every cache miss. Here each column is turned into JSON text
+    in one vectorized pass, the columns are joined into row arrays, and the rows
+    into one string; Python only assembles the few pieces around them. Run
+    `python -m tools.bench_serialize` to compare against the per-row encoder.
+    """
     df = round_floats(df)
-    payload = {
-        "cols": spec_for(df),
-        "rows": [list(row) for row in df.iter_rows()],
-        "count": df.height,
-    }
-    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return _json_object(
+        {"cols": spec_for(df)}, ',"rows":[%s],"count":%d' % (_json_rows(df), df.height), extra
+    )
 
 
-def _cache_key(name: str, version: int) -> str:
-    return f"{name}@{version}"
+def _json_rows(df: pl.DataFrame) -> str:
+    """The rows of an already rounded frame as comma-separated JSON arrays."""
+    if not (df.height and df.width):
+        return ""
+    if df.height < SMALL_FRAME_ROWS:
+        return _json_rows_per_row(df)
+    literals = _json_literals(df)
+    return literals.select(
+        pl.concat_str(
+            [pl.lit("["), pl.concat_str(literals.columns, separator=","), pl.lit("]")]
+        )
+    ).to_series().str.join(",").item()
 
 
-def _cached_payload(name: str, builder: Callable) -> bytes:
-    store = current_app.config["DATA_STORE"]
-    cache = current_app.config.setdefault("API_CACHE", {})
-    key = _cache_key(name, store.version)
+def _json_rows_per_row(df: pl.DataFrame) -> str:
+    """What _json_rows returns, built a Python row at a time.
 
-    if key in cache:
-        return cache[key]
+    On a few dozen rows the vectorized pass costs more to set up than it
+    saves: up to 3x slower than the per-row encoder it replaced, where this
+    is level with it (see tools/bench_serialize.py).
+    """
+    # One json.dumps of every row, less the brackets around the list.
+    rows = json.dumps(df.rows(), separators=(",", ":"), default=str)[1:-1]
+    if "NaN" in rows or "Infinity" in rows:
+        # Rare, so only then: null for NaN and inf, as _json_literal writes them.
+        floats = [name for name, dtype in df.schema.items() if dtype in (pl.Float32, pl.Float64)]
+        df = df.with_columns(
+            pl.when(pl.col(name).is_finite()).then(pl.col(name)).alias(name)
+            for name in floats
+        )
+        rows = json.dumps(df.rows(), separators=(",", ":"), default=str)[1:-1]
+    return rows
 
-    payload = _serialize(builder(store.data))
 
-    # Drop entries from superseded versions only. Clearing everything would
-    # evict the eight league-wide tables each time a player page is opened.
-    suffix = f"@{store.version}"
-    for stale in [k for k in cache if not k.endswith(suffix)]:
-        del cache[stale]
+def _serialize_columns(df: pl.DataFrame, **extra) -> bytes:
+    """`{"cols", "data", "count"}`: each column as one array, keyed by column.
 
-    cache[key] = payload
-    logger.debug("Cached %s payload (%d KB)", name, len(payload) // 1024)
-    return payload
+    Opt-in with `?layout=columns`. Cheaper to produce than rows, since no row
+    arrays are assembled, and what a charting client wants anyway.
+    """
+    df = round_floats(df)
+    literals = _json_literals(df)
+    data = ",".join(
+        "%s:[%s]" % (json.dumps(name), literals[name].str.join(",").item() if df.height else "")
+        for name in literals.columns
+    )
+    return _json_object(
+        {"cols": spec_for(df)}, ',"data":{%s},"count":%d' % (data, df.height), extra
+    )
+
+
+def _cached_bytes(
+    name: str, build: Callable, snapshot: Optional[Tuple] = None, persist: bool = True
+) -> bytes:
+    """Payload for `name` at the current version, built once however many
+    requests ask for it at the same time. `build` takes the dataset and
+    returns the serialized bytes. `snapshot` pins the (data, version) pair
+    when the caller has already read one. Without `persist` the payload is
+    kept in memory only (see _known_player)."""
+    data, version = snapshot or current_app.config["DATA_STORE"].snapshot()
+    return current_app.config["API_CACHE"].get_or_build(
+        name,
+        version,
+        lambda: build(data),
+        namespace=namespace_for(data) if persist else "",
+    )
+
+
+def _known_player(data, name: str) -> bool:
+    """Whether `name` is a player in `data`, the build the payload is made from.
+
+    Player and date routes answer any name, with empty tables for one that
+    doesn't exist. Those answers are cached in memory like any other, where
+    the byte budget bounds them, but only real players' and dates' payloads
+    are filed on disk, which nothing bounds within a build. Callers check
+    against the same snapshot they build from, so a swap mid-request can't
+    file one build's payload on the strength of the other's players.
+    """
+    return not data.rows_for("player_data", "player", name).is_empty()
+
+
+def _known_date(data, date: str) -> bool:
+    """Whether games were played on `date` in `data`."""
+    return not data.rows_for("days", "game_date", date).is_empty()
+
+
+def _serialize_arrow(df: pl.DataFrame, **extra) -> bytes:
+    """The frame as an Arrow IPC stream, for clients that read columns natively.
+
+    Written straight from Polars' buffers, so unlike the JSON there is no
+    Python object per cell; on the Opponents table that is ~15x less CPU. The
+    column spec, and any paging fields, travel as JSON in the schema metadata.
+    """
+    # pyarrow is slow to import and only this format needs it.
+    import pyarrow as pa
+
+    df = round_floats(df)
+    metadata = {"cols": json.dumps(spec_for(df), separators=(",", ":"))}
+    metadata.update((key, json.dumps(value)) for key, value in extra.items())
+    table = df.to_arrow()
+    table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# Wire formats for frame payloads: serializer and content type.
+FORMATS: Dict[str, Tuple[Callable, str]] = {
+    "json": (_serialize, "application/json"),
+    "columns": (_serialize_columns, "application/json"),
+    "arrow": (_serialize_arrow, ARROW_MIMETYPE),
+}
+
+
+def _requested_format() -> str:
+    """`?format=` when given, otherwise whatever the Accept header prefers.
+
+    JSON wins ties, so browsers sending */* keep getting what they always got.
+    JSON comes as rows unless `?layout=columns`. Raises ValueError for a
+    format or layout that doesn't exist.
+    """
+    name = request.args.get("format")
+    if name is None:
+        best = request.accept_mimetypes.best_match(["application/json", ARROW_MIMETYPE])
+        name = "arrow" if best == ARROW_MIMETYPE else "json"
+    elif name not in FORMATS:
+        raise ValueError(f"unknown format '{name}'")
+
+    layout = request.args.get("layout", "rows")
+    if layout not in ("rows", "columns"):
+        raise ValueError(f"unknown layout '{layout}'")
+    if name == "json" and layout == "columns":
+        return "columns"
+    return name
+
+
+def _format_key(name: str, fmt: str) -> str:
+    """Cache key for a payload in `fmt`. JSON keeps the plain key the warmer
+    and the disk tier already use."""
+    return name if fmt == "json" else f"{name}#{fmt}"
+
+
+def _cached_payload(
+    name: str,
+    builder: Callable,
+    fmt: str = "json",
+    snapshot: Optional[Tuple] = None,
+    persist: bool = True,
+) -> bytes:
+    """A table payload: `builder` returns a frame, serialized on the way in."""
+    serialize = FORMATS[fmt][0]
+    return _cached_bytes(
+        _format_key(name, fmt), lambda data: serialize(builder(data)), snapshot, persist
+    )
 
 
 def payload_etag(payload: bytes) -> str:
@@ -192,16 +443,16 @@ def payload_etag(payload: bytes) -> str:
     return 'W/"%s"' % hashlib.sha1(payload).hexdigest()[:16]
 
 
-def _json_response(payload: bytes) -> Response:
+def _json_response(payload: bytes, mimetype: str = "application/json") -> Response:
     """Return JSON, gzipped when it is worth it and the client accepts it."""
     accepts_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
 
     if accepts_gzip and len(payload) >= GZIP_MIN_BYTES:
         body = gzip.compress(payload, compresslevel=6)
-        response = Response(body, mimetype="application/json")
+        response = Response(body, mimetype=mimetype)
         response.headers["Content-Encoding"] = "gzip"
     else:
-        response = Response(payload, mimetype="application/json")
+        response = Response(payload, mimetype=mimetype)
 
     response.headers["Vary"] = "Accept-Encoding"
     response.headers["ETag"] = payload_etag(payload)
@@ -212,27 +463,295 @@ def _json_response(payload: bytes) -> Response:
     return response
 
 
+def _frame_response(payload: bytes, fmt: str) -> Response:
+    """A frame payload in `fmt`. Varies on Accept too, since that picks the format."""
+    response = _json_response(payload, mimetype=FORMATS[fmt][1])
+    response.headers["Vary"] = "Accept-Encoding, Accept"
+    return response
+
+
+def _frame_route(
+    name: str, builder: Callable, snapshot: Optional[Tuple] = None, persist: bool = True
+) -> Response:
+    """Serve a cached frame payload in whichever format was asked for."""
+    try:
+        fmt = _requested_format()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return _frame_response(
+        _cached_payload(name, builder, fmt, snapshot=snapshot, persist=persist), fmt
+    )
+
+
 # -- routes ----------------------------------------------------------------
 
+def _table_frame(name: str, data, version: int) -> pl.DataFrame:
+    """The rounded frame behind a league table, built once per version.
+
+    Every page of every query on a table runs against this, so paging through
+    a table or re-sorting it never rebuilds the frame.
+    """
+    with _frames_lock:
+        cached = _frames.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    frame = round_floats(DATASETS[name](data))
+    with _frames_lock:
+        # A request that began before a swap mustn't replace a newer frame.
+        current = _frames.get(name)
+        if current is None or current[0] < version:
+            _frames[name] = (version, frame)
+    return frame
+
+
+def row_manifest(data) -> pl.DataFrame:
+    """Row keys and hashes of every league table, for delta.py."""
+    return pl.concat(
+        delta.table_manifest(name, round_floats(build(data)))
+        for name, build in DATASETS.items()
+    )
+
+
+def _table_delta(name: str, since: str, snapshot: Tuple) -> bytes:
+    """The rows of a table that changed since build `since` (see delta.py).
+
+    `{"cols", "build", "since", "key", "upserts", "deletes", "count"}`:
+    upserts are whole rows, in table order, to insert or replace by key;
+    deletes are the key values of rows to remove; count is the table's length
+    once patched. Raises StaleBuildError when the table can't be diffed
+    against that build, and the client should fetch it whole.
+    """
+    data, version = snapshot
+    build = delta.build_id(data)
+    if not delta.is_build_id(since):
+        raise QueryError("since must be a build, as sent in X-Data-Build")
+    if not build:
+        raise delta.StaleBuildError("the build being served can't be synced from")
+    manifests = current_app.config["ROW_MANIFESTS"]
+
+    def make() -> bytes:
+        current = manifests.ensure(build, lambda: row_manifest(data))
+        old = current if since == build else manifests.get(since)
+        if old is None:
+            raise delta.StaleBuildError(f"no record of build '{since}'")
+        keys, deletes = delta.diff(old, current, name)
+        frame = _table_frame(name, data, version)
+        rows = frame.filter(delta.row_key(name).is_in(keys))
+        head = {
+            "cols": spec_for(frame),
+            "build": build,
+            "since": since,
+            "key": list(delta.ROW_KEYS[name]),
+        }
+        body = ',"upserts":[%s],"deletes":%s,"count":%d' % (
+            _json_rows(rows),
+            json.dumps(deletes, separators=(",", ":"), default=str),
+            frame.height,
+        )
+        return _json_object(head, body, {})
+
+    # Memory only: every build a client could name is a separate entry.
+    return current_app.config["API_CACHE"].get_or_build(
+        f"{name}?since={since}", version, make
+    )
+
+
+def _first_page_key(name: str) -> str:
+    """Cache key of the page `name` asks for first (see FIRST_PAGE_SORT)."""
+    sort = FIRST_PAGE_SORT.get(name)
+    return f"{name}?{first_page_key(FIRST_PAGE_ROWS, '-' + sort if sort else '')}"
+
+
+def _first_page_payload(name: str, data) -> bytes:
+    """The page `name` asks for first, as _table_query would serialize it."""
+    frame = round_floats(DATASETS[name](data))
+    sort = FIRST_PAGE_SORT.get(name)
+    args = {"limit": str(FIRST_PAGE_ROWS), **({"sort": "-" + sort} if sort else {})}
+    page, total = TableQuery(args, frame).run(frame)
+    return _serialize(page, total=total, offset=0)
+
+
+def _table_query(name: str, fmt: str, snapshot: Tuple) -> bytes:
+    data, version = snapshot
+    frame = _table_frame(name, data, version)
+    query = TableQuery(request.args, frame)
+    serialize = FORMATS[fmt][0]
+
+    def build() -> bytes:
+        page, total = query.run(frame)
+        return serialize(page, total=total, offset=query.offset)
+
+    # Memory only, but for each table's first page, which every visit asks for
+    # and the warmer builds. Queries are open-ended, and the disk tier would
+    # keep every one ever asked for, for as long as the build is served.
+    key = f"{name}?{query.key}"
+    first_page = fmt == "json" and key == _first_page_key(name)
+    return current_app.config["API_CACHE"].get_or_build(
+        _format_key(key, fmt),
+        version,
+        build,
+        namespace=namespace_for(data) if first_page else "",
+    )
+
+
+def _stream_json(frame: pl.DataFrame) -> Iterator[bytes]:
+    """The same document `_serialize` builds, STREAM_BATCH_ROWS rows at a time."""
+    yield json.dumps({"cols": spec_for(frame)}, separators=(",", ":"))[:-1].encode("utf-8")
+    yield b',"rows":['
+    for offset in range(0, frame.height, STREAM_BATCH_ROWS):
+        rows = _json_rows(frame.slice(offset, STREAM_BATCH_ROWS))
+        yield (("," if offset else "") + rows).encode("utf-8")
+    yield b'],"count":%d}' % frame.height
+
+
+def _stream_arrow(frame: pl.DataFrame) -> Iterator[bytes]:
+    """The same stream `_serialize_arrow` writes, one record batch at a time."""
+    import pyarrow as pa
+
+    metadata = {"cols": json.dumps(spec_for(frame), separators=(",", ":"))}
+    sink = io.BytesIO()
+
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    schema = frame.head(0).to_arrow().replace_schema_metadata(metadata).schema
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for offset in range(0, frame.height, STREAM_BATCH_ROWS):
+            batch = frame.slice(offset, STREAM_BATCH_ROWS).to_arrow()
+            writer.write_table(batch.replace_schema_metadata(metadata))
+            yield drain()
+    yield drain()
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress as the chunks arrive; only the compressor's window is held."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip framing
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _table_stream(name: str, fmt: str, snapshot: Tuple) -> Response:
+    """A whole league table, encoded and sent in batches.
+
+    For `?stream=1`. The buffered path holds the serialized table, its gzip
+    copy and the response body at once, and on the largest tables that is
+    most of the machine's headroom. Here each batch of rows is encoded,
+    compressed and sent before the next is touched, so what a request holds
+    beyond the table's frame is bounded by STREAM_BATCH_ROWS, not by the table.
+    Nothing is cached; a client that wants the cached payload leaves the
+    parameter off.
+    """
+    data, version = snapshot
+
+    # The body isn't known until it has been sent, so the validator names the
+    # artifact build instead, which like a payload hash survives a restart.
+    namespace = namespace_for(data)
+    etag = None
+    if namespace:
+        digest = hashlib.sha1(f"{namespace}:{name}:{fmt}:stream".encode("utf-8"))
+        etag = 'W/"%s"' % digest.hexdigest()[:16]
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304)
+
+    frame = _table_frame(name, data, version)
+    chunks = (_stream_arrow if fmt == "arrow" else _stream_json)(frame)
+    response = Response(mimetype=FORMATS[fmt][1])
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        chunks = _gzip_chunks(chunks)
+        response.headers["Content-Encoding"] = "gzip"
+    response.response = stream_with_context(chunks)
+
+    response.headers["Vary"] = "Accept-Encoding, Accept"
+    response.headers["Cache-Control"] = "no-cache"
+    if etag:
+        response.headers["ETag"] = etag
+    return response
+
+
+@api.route("/events")
+def events():
+    """Dataset swaps as server-sent events (see events.py)."""
+    stream = current_app.config["EVENT_HUB"].subscribe(
+        request.headers.get("Last-Event-ID")
+    )
+    if stream is None:
+        response = jsonify({"error": "too many open event streams"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "60"
+        return response
+
+    response = Response(stream, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Proxies that buffer responses would hold events back until the stream ends.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @api.route("/table/<name>")
 def table(name: str):
+    """A league table: all of it, one page of it (see table_query.py), all of
+    it streamed in batches, or the rows changed since a build (see delta.py).
+
+    Every answer names the build it came from in X-Data-Build, which is what
+    a client passes back as `since`.
+    """
     builder = DATASETS.get(name)
     if builder is None:
         return jsonify({"error": f"unknown dataset '{name}'"}), 404
 
-    payload = _cached_payload(name, builder)
-
-    etag = payload_etag(payload)
-    if request.headers.get("If-None-Match") == etag:
-        return Response(status=304)
-
-    return _json_response(payload)
+    try:
+        fmt = _requested_format()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    # One read of the store, so the build named in the header is the one the
+    # rows came from even if a swap lands mid-request.
+    snapshot = current_app.config["DATA_STORE"].snapshot()
+    build = delta.build_id(snapshot[0])
+
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        if is_query(request.args) or "since" in request.args:
+            error = "stream sends the whole table; page with offset and limit instead"
+            return jsonify({"error": error}), 400
+        if fmt == "columns":
+            return jsonify({"error": "layout=columns can't be streamed"}), 400
+        response = _table_stream(name, fmt, snapshot)
+    else:
+        try:
+            if "since" in request.args:
+                if fmt != "json" or is_query(request.args):
+                    raise QueryError("since returns JSON rows for the whole table")
+                payload = _table_delta(name, request.args["since"], snapshot)
+            elif is_query(request.args):
+                payload = _table_query(name, fmt, snapshot)
+            else:
+                payload = _cached_payload(name, builder, fmt, snapshot)
+        except delta.StaleBuildError as exc:
+            return jsonify({"error": str(exc), "build": build}), 410
+        except QueryError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        if request.headers.get("If-None-Match") == payload_etag(payload):
+            response = Response(status=304)
+        else:
+            response = _frame_response(payload, fmt)
+
+    if build:
+        response.headers["X-Data-Build"] = build
+    return response
 
 
 def _player_game_log(data, name: str) -> pl.DataFrame:
     """A player's games. `winner` is 1/0 in the model; show it as W/L."""
     return _order(
-        data.player_games.filter(pl.col("player") == name)
+        data.rows_for("player_games", "player", name)
         .drop(["player", "rating", "resident"])
         .with_columns(
             pl.when(pl.col("winner") == 1)
@@ -247,17 +766,17 @@ def _player_game_log(data, name: str) -> pl.DataFrame:
 PLAYER_SCOPED = {
     "games": _player_game_log,
     "days": lambda data, name: _order(
-        data.player_days.filter(pl.col("player") == name).drop(
+        data.rows_for("player_days", "player", name).drop(
             ["player", "rating", "resident"]
         ),
         ["game_date", "day", "games_played", "wins", "losses"],
     ).sort("game_date", descending=True),
     "teammates": lambda data, name: _order(
-        data.teammates.filter(pl.col("player") == name).drop(["player", "pairing"]),
+        data.rows_for("teammates", "player", name).drop(["player", "pairing"]),
         ["teammate", "games_played", "wins", "losses", "win_pct"],
     ).sort(["games_played", "win_pct"], descending=[True, True]),
     "opponents": lambda data, name: _order(
-        data.opponents.filter(pl.col("player") == name).drop(["player"]),
+        data.rows_for("opponents", "player", name).drop(["player"]),
         ["opponent", "games_played", "wins", "losses", "win_pct"],
     ).sort(["games_played", "win_pct"], descending=[True, True]),
 }
@@ -266,7 +785,7 @@ DATE_SCOPED = {
     # Sorted by Gospel descending: who most outperformed expectation that day,
     # which is the same measure that decides the day's MVP and LVP.
     "players": lambda data, date: _order(
-        data.player_days.filter(pl.col("game_date") == date).drop(
+        data.rows_for("player_days", "game_date", date).drop(
             ["game_date", "day", "rating", "resident"]
         ),
         [
@@ -281,7 +800,7 @@ DATE_SCOPED = {
         ["result_vs_expectation_avg", "player"], descending=[True, False], nulls_last=True
     ),
     "games": lambda data, date: _order(
-        _first_poss_label(data.games.filter(pl.col("game_date") == date)).drop(
+        _first_poss_label(data.rows_for("games", "game_date", date)).drop(
             [c for c in _GAME_INTERNALS if c in data.games.columns] + ["game_date"]
         ),
         ["game_num", "winner", "a_score", "b_score"],
@@ -289,162 +808,13 @@ DATE_SCOPED = {
 }
 
 
-# How lopsided the nine other players were. Bands are round numbers close to
-# the actual quintiles of other_9_players_quality_diff, so each holds a
-# meaningful share of games rather than being empty at the edges.
-# The cutoff is carried in the label so the bucket is self-explanatory without
-# needing the legend.
-ADVANTAGE_BANDS = [
-    (None, -3.0, "Much worse team (under −3)"),
-    (-3.0, -1.0, "Worse team (−3 to −1)"),
-    (-1.0, 1.0, "Even matchup (−1 to +1)"),
-    (1.0, 3.0, "Better team (+1 to +3)"),
-    (3.0, None, "Much better team (over +3)"),
-]
-
-# 1 -> 1st, 2 -> 2nd, and so on, for rank labels.
-ORDINALS = {
-    1: "1st", 2: "2nd", 3: "3rd", 4: "4th", 5: "5th",
-    6: "6th", 7: "7th", 8: "8th", 9: "9th", 10: "10th",
-}
-
-# Total rating of the other nine on the floor. Other9 measures the gap between
-# the two sides; this measures the level both sides are playing at, which is a
-# separate question — the two correlate at only about -0.1. Bands sit near the
-# quintiles of the observed distribution.
-COURT_QUALITY_BANDS = [
-    (None, -1.0, "Weakest games (under −1)"),
-    (-1.0, 1.0, "Weak games (−1 to +1)"),
-    (1.0, 3.0, "Average games (+1 to +3)"),
-    (3.0, 5.0, "Strong games (+3 to +5)"),
-    (5.0, None, "Strongest games (over +5)"),
-]
-
-# How many of the five opponents out-rate the player.
-OPPONENTS_BETTER = {
-    0: "Better than all 5 opponents",
-    1: "Better than 4 of 5",
-    2: "Better than 3 of 5",
-    3: "Better than 2 of 5",
-    4: "Better than 1 of 5",
-    5: "Worse than all 5 opponents",
-}
-
-SPLIT_KINDS = {
-    "team_rank": ("team_rank", "Rank on own team"),
-    "court_rank": ("court_rank", "Rank among all ten"),
-    "vs_opponents": ("vs_opponents", "Rank versus opponents"),
-    "advantage": ("advantage", "Team advantage"),
-    "court_quality": ("court_quality", "Overall on-court quality"),
-}
-
-
-def _banded(column: str, bands) -> pl.Expr:
-    """Bucket a numeric column into labelled bands."""
-    expr = pl.when(pl.col(column) < bands[0][1]).then(pl.lit(bands[0][2]))
-    for low, high, label in bands[1:-1]:
-        expr = expr.when(
-            (pl.col(column) >= low) & (pl.col(column) < high)
-        ).then(pl.lit(label))
-    return expr.otherwise(pl.lit(bands[-1][2])).alias("split")
-
-
-def _split_label(kind: str) -> pl.Expr:
-    """Readable bucket name for each split."""
-    if kind == "team_rank":
-        return (
-            pl.when(pl.col("team_rank") == 1).then(pl.lit("1st — best on team"))
-            .when(pl.col("team_rank") == 2).then(pl.lit("2nd — second option"))
-            .when(pl.col("team_rank") == 3).then(pl.lit("3rd — middle option"))
-            .when(pl.col("team_rank") == 4).then(pl.lit("4th — fourth option"))
-            .when(pl.col("team_rank") == 5).then(pl.lit("5th — last option"))
-            .otherwise(pl.lit("Unranked"))
-            .alias("split")
-        )
-
-    if kind == "court_rank":
-        return (
-            pl.when(pl.col("court_rank") == 1).then(pl.lit("1st — best on court"))
-            .when(pl.col("court_rank") == 10).then(pl.lit("10th — last on court"))
-            .otherwise(
-                pl.col("court_rank").replace_strict(ORDINALS, default="?")
-                + pl.lit(" on court")
-            )
-            .alias("split")
-        )
-
-    if kind == "vs_opponents":
-        return (
-            pl.col("opps_better")
-            .replace_strict(OPPONENTS_BETTER, default="Roster error")
-            .alias("split")
-        )
-
-    if kind == "court_quality":
-        return _banded("court_quality", COURT_QUALITY_BANDS)
-
-    return _banded("other_9_players_quality_diff", ADVANTAGE_BANDS)
-
-
 def _player_splits(data, player_name: str, kind: str) -> pl.DataFrame:
-    """Aggregate a player's games into buckets, one row per bucket."""
-    sort_col = {
-        "team_rank": "team_rank",
-        "court_rank": "court_rank",
-        "vs_opponents": "opps_better",
-    }.get(kind)
-
-    games = data.player_games.filter(pl.col("player") == player_name).with_columns(
-        # Opponents who out-rate this player. court_rank counts everyone on the
-        # floor rated above them and team_rank counts just their own side, so
-        # the difference is exactly the opponents above them — no second join.
-        (pl.col("court_rank") - pl.col("team_rank")).alias("opps_better"),
-        # The talent level of the other nine, as opposed to the gap between
-        # the sides that other_9_players_quality_diff measures.
-        (pl.col("teammate_quality") + pl.col("opp_quality")).alias("court_quality"),
-    ).with_columns(_split_label(kind))
-
-    if sort_col:
-        games = games.with_columns(pl.col(sort_col).alias("_order"))
-    else:
-        # Order bands weakest-to-strongest, not alphabetically.
-        bands = COURT_QUALITY_BANDS if kind == "court_quality" else ADVANTAGE_BANDS
-        order = {label: i for i, (_, _, label) in enumerate(bands)}
-        games = games.with_columns(
-            pl.col("split").replace_strict(order, default=99).alias("_order")
-        )
-
+    """A player's games bucketed one way, one row per bucket. Computed for
+    every player by the build (see collective_bball/splits.py)."""
     return (
-        games.group_by(["split", "_order"])
-        .agg(
-            pl.len().alias("games_played"),
-            pl.col("winner").sum().cast(pl.Int32).alias("wins"),
-            pl.col("score_diff").mean().round(2).alias("avg_score_diff"),
-            pl.col("proj_score_diff").mean().round(2).alias("proj_score_diff"),
-            pl.col("result_vs_expectation").mean().round(2).alias("result_vs_expectation"),
-            pl.col("win_prob").mean().round(3).alias("win_prob"),
-            pl.col("teammate_quality").mean().round(2).alias("teammate_quality"),
-            pl.col("opp_quality").mean().round(2).alias("opp_quality"),
-            pl.col("other_9_players_quality_diff")
-            .mean()
-            .round(2)
-            .alias("other_9_players_quality_diff"),
-            pl.col("court_quality").mean().round(2).alias("court_quality"),
-        )
-        .with_columns(
-            (pl.col("games_played") - pl.col("wins")).cast(pl.Int64).alias("losses"),
-            (pl.col("wins") / pl.col("games_played")).round(4).alias("win_pct"),
-        )
-        .sort("_order")
-        .drop("_order")
-        .select(
-            [
-                "split", "games_played", "wins", "losses", "win_pct", "win_prob",
-                "result_vs_expectation", "avg_score_diff", "proj_score_diff",
-                "other_9_players_quality_diff", "court_quality",
-                "teammate_quality", "opp_quality",
-            ]
-        )
+        data.rows_for("player_splits", "player", player_name)
+        .filter(pl.col("kind") == kind)
+        .select(SPLIT_COLUMNS)
     )
 
 
@@ -452,11 +822,12 @@ def _player_splits(data, player_name: str, kind: str) -> pl.DataFrame:
 def player_splits(player_name: str, kind: str):
     if kind not in SPLIT_KINDS:
         return jsonify({"error": f"unknown split '{kind}'"}), 404
-    return _json_response(
-        _cached_payload(
-            f"splits:{player_name}:{kind}",
-            lambda data: _player_splits(data, player_name, kind),
-        )
+    snapshot = current_app.config["DATA_STORE"].snapshot()
+    return _frame_route(
+        f"splits:{player_name}:{kind}",
+        lambda data: _player_splits(data, player_name, kind),
+        snapshot,
+        persist=_known_player(snapshot[0], player_name),
     )
 
 
@@ -465,12 +836,12 @@ def player_table(player_name: str, dataset: str):
     builder = PLAYER_SCOPED.get(dataset)
     if builder is None:
         return jsonify({"error": f"unknown player dataset '{dataset}'"}), 404
-    store = current_app.config["DATA_STORE"]
-    return _json_response(
-        _cached_payload(
-            f"player:{player_name}:{dataset}",
-            lambda data: builder(data, player_name),
-        )
+    snapshot = current_app.config["DATA_STORE"].snapshot()
+    return _frame_route(
+        f"player:{player_name}:{dataset}",
+        lambda data: builder(data, player_name),
+        snapshot,
+        persist=_known_player(snapshot[0], player_name),
     )
 
 
@@ -479,49 +850,123 @@ def date_table(date: str, dataset: str):
     builder = DATE_SCOPED.get(dataset)
     if builder is None:
         return jsonify({"error": f"unknown date dataset '{dataset}'"}), 404
-    return _json_response(
-        _cached_payload(f"date:{date}:{dataset}", lambda data: builder(data, date))
+    snapshot = current_app.config["DATA_STORE"].snapshot()
+    return _frame_route(
+        f"date:{date}:{dataset}",
+        lambda data: builder(data, date),
+        snapshot,
+        persist=_known_date(snapshot[0], date),
+    )
+
+
+def _search_entries(data) -> Tuple[list, list]:
+    """Players by games played, then dates newest first, as the header renders them."""
+    players = (
+        data.player_data.select(
+            ["player", "full_name", "games_played", "rating", "active_player"]
+        )
+        .sort("games_played", descending=True)
+        .to_dicts()
     )
+    players = [
+        {
+            "t": "p",
+            "n": row["player"],
+            "f": row.get("full_name") or "",
+            "g": row["games_played"],
+            "r": round(row["rating"], 2) if row["rating"] is not None else None,
+            "a": bool(row.get("active_player")),
+            "i": player_images.has_thumb(row["player"]),
+        }
+        for row in players
+    ]
+    dates = [
+        {"t": "d", "n": row["game_date"], "f": row["day"], "g": row["num_games"]}
+        for row in data.days.select(["game_date", "day", "num_games"])
+        .sort("game_date", descending=True)
+        .to_dicts()
+    ]
+    return players, dates
+
+
+def _with_images(name: str) -> str:
+    """Cache key for a payload that flags which players have a picture.
+
+    Those flags come from the picture manifest, not the build, and the
+    manifest can change while a build is served, so the key names its
+    revision too, as page_cache.py does for pages.
+    """
+    return f"{name}|images={player_images.revision}"
+
+
+def _search_payload(data) -> bytes:
+    players, dates = _search_entries(data)
+    return json.dumps(
+        {"entries": players + dates}, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def _search_index_for(data, version: int) -> SearchIndex:
+    """The header search's index, built once per version and picture manifest
+    revision (see search_index.py)."""
+    global _search_index
+    revision = player_images.revision
+    with _search_index_lock:
+        cached = _search_index
+        if cached is not None and cached[:2] == (version, revision):
+            return cached[2]
+        index = SearchIndex(*_search_entries(data))
+        # Built under the lock: it takes milliseconds, and a swap would
+        # otherwise have every typing visitor build it at once.
+        if cached is None or cached[0] <= version:
+            _search_index = (version, revision, index)
+        return index
 
 
 @api.route("/search")
 def search():
-    """Index for the header search: every player and every game date."""
-    store = current_app.config["DATA_STORE"]
-    cache = current_app.config.setdefault("API_CACHE", {})
-    key = _cache_key("__search", store.version)
-    if key not in cache:
-        data = store.data
-        players = (
-            data.player_data.select(
-                ["player", "full_name", "games_played", "rating", "active_player"]
-            )
-            .sort("games_played", descending=True)
-            .to_dicts()
+    """Header search. `?q=` answers with the best `k` matches (default 8);
+    without it, every player and every game date, for older pages."""
+    query = request.args.get("q")
+    if query is None:
+        return _json_response(_cached_bytes(_with_images("__search"), _search_payload))
+
+    try:
+        limit = int(request.args.get("k", DEFAULT_RESULTS))
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    data, version = current_app.config["DATA_STORE"].snapshot()
+    entries = _search_index_for(data, version).search(query, limit)
+    body = json.dumps(
+        {"q": query, "entries": entries}, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    return _json_response(body)
+
+
+def _ratings_history_payload(data) -> bytes:
+    # Laid out by the build (see artifacts.ratings_history_chart).
+    return data.chart("ratings_history_chart")
+
+
+_ratings_chart: Optional[Tuple[int, dict]] = None
+_ratings_chart_lock = threading.Lock()
+
+
+def _ratings_chart_for(data, version: int) -> dict:
+    """The ratings-history chart, parsed once per version for downsampling."""
+    global _ratings_chart
+    with _ratings_chart_lock:
+        cached = _ratings_chart
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        chart = json.loads(
+            _cached_bytes("__ratings_history", _ratings_history_payload, (data, version))
         )
-        entries = [
-            {
-                "t": "p",
-                "n": row["player"],
-                "f": row.get("full_name") or "",
-                "g": row["games_played"],
-                "r": round(row["rating"], 2) if row["rating"] is not None else None,
-                "a": bool(row.get("active_player")),
-                "i": player_thumb_path(row["player"]).exists(),
-            }
-            for row in players
-        ]
-        entries += [
-            {"t": "d", "n": row["game_date"], "f": row["day"], "g": row["num_games"]}
-            for row in data.days.select(["game_date", "day", "num_games"])
-            .sort("game_date", descending=True)
-            .to_dicts()
-        ]
-        cache[key] = json.dumps(
-            {"entries": entries}, separators=(",", ":"), default=str
-        ).encode("utf-8")
-
-    return _json_response(cache[key])
+        if cached is None or cached[0] < version:
+            _ratings_chart = (version, chart)
+        return chart
 
 
 @api.route("/charts/ratings-history")
@@ -532,48 +977,54 @@ def chart_ratings_history():
     far smaller than repeating the date on every point. Players are ordered by
     current rating so the front end can color the leaders and leave the rest
     as recessive context.
+
+    At most `?points=` dates are sent (default 400), from `?from=` to `?to=`
+    when given; see downsample.py. The whole chart, when it fits the budget,
+    goes out as the build wrote it.
     """
-    store = current_app.config["DATA_STORE"]
-    cache = current_app.config.setdefault("API_CACHE", {})
-    key = _cache_key("__ratings_history", store.version)
-
-    if key not in cache:
-        with store.db() as conn:
-            rows = conn.execute(
-                "SELECT player, date, rating FROM ratings "
-                "WHERE player NOT ILIKE '%tier%' ORDER BY date"
-            ).fetchall()
-
-        dates = sorted({str(date) for _player, date, _rating in rows})
-        date_index = {date: i for i, date in enumerate(dates)}
-
-        series = {}
-        for player, date, rating in rows:
-            series.setdefault(player, [None] * len(dates))[
-                date_index[str(date)]
-            ] = round(float(rating), 3)
-
-        # Order by most recent rating so slot 1 is the current leader.
-        current = {
-            row["player"]: row["rating"]
-            for row in store.data.ratings.to_dicts()
-            if row["rating"] is not None
-        }
-        ordered = sorted(
-            series.items(),
-            key=lambda item: current.get(item[0], -99),
-            reverse=True,
+    try:
+        points = int(request.args.get("points", DEFAULT_POINTS))
+    except ValueError:
+        return jsonify({"error": "points must be an integer"}), 400
+    points = max(MIN_POINTS, min(points, MAX_POINTS))
+
+    bounds = []
+    for param in ("from", "to"):
+        value = request.args.get(param) or None
+        if value is not None:
+            try:
+                value = datetime.date.fromisoformat(value).isoformat()
+            except ValueError:
+                return jsonify({"error": f"{param} must be a YYYY-MM-DD date"}), 400
+        bounds.append(value)
+
+    data, version = current_app.config["DATA_STORE"].snapshot()
+    chart = _ratings_chart_for(data, version)
+    dates = chart["dates"]
+    lo, hi = window(dates, *bounds)
+    zoomed = (lo, hi) != (0, len(dates))
+    if not zoomed and hi - lo <= points:
+        return _json_response(
+            _cached_bytes("__ratings_history", _ratings_history_payload, (data, version))
         )
 
-        cache[key] = json.dumps(
-            {
-                "dates": dates,
-                "series": [{"name": name, "v": values} for name, values in ordered],
-            },
-            separators=(",", ":"),
-        ).encode("utf-8")
-
-    return _json_response(cache[key])
+    # Named by the dates the window actually covers, so every way of asking
+    # for the same slice shares one entry. Only the default budget of the
+    # whole chart, which is what pages ask for, is filed on disk; zoomed
+    # slices and other budgets stay in memory, there being too many possible
+    # ones for the disk, which nothing bounds within a build.
+    name = f"__ratings_history|points={points}"
+    if zoomed:
+        name += f"|{dates[lo]}..{dates[hi - 1]}" if hi > lo else "|empty"
+    body = current_app.config["API_CACHE"].get_or_build(
+        name,
+        version,
+        lambda: json.dumps(
+            downsample(chart, points, lo, hi), separators=(",", ":")
+        ).encode("utf-8"),
+        namespace=namespace_for(data) if not zoomed and points == DEFAULT_POINTS else "",
+    )
+    return _json_response(body)
 
 
 # Every numeric field worth putting on an axis of the player scatter. Order
@@ -611,6 +1062,40 @@ SCATTER_FIELDS = [
 ]
 
 
+def _scatter_payload(data) -> bytes:
+    available = [f for f in SCATTER_FIELDS if f in data.player_data.columns]
+
+    rated = round_floats(
+        data.player_data.filter(pl.col("tiered_rating") == 0).select(
+            ["player"] + available
+        )
+    )
+
+    dtypes = dict(zip(rated.columns, rated.dtypes))
+    fields = [
+        {
+            "key": f,
+            "label": label_for(f),
+            "type": type_for(f, dtypes[f]),
+            "dp": 1 if type_for(f, dtypes[f]) == "pct" else 2,
+        }
+        for f in available
+    ]
+
+    players = [
+        {
+            "n": row["player"],
+            "i": player_images.has_thumb(row["player"]),
+            "v": [row[f] for f in available],
+        }
+        for row in rated.to_dicts()
+    ]
+
+    return json.dumps(
+        {"fields": fields, "players": players}, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
 @api.route("/charts/player-scatter")
 def chart_player_scatter():
     """Every rated player as a point, with any field selectable per axis.
@@ -619,63 +1104,16 @@ def chart_player_scatter():
     group estimate, so plotting them against rating would cluster them at
     identical x-values that describe the tier rather than the player.
     """
-    store = current_app.config["DATA_STORE"]
-    cache = current_app.config.setdefault("API_CACHE", {})
-    key = _cache_key("__scatter", store.version)
-
-    if key not in cache:
-        data = store.data
-        available = [f for f in SCATTER_FIELDS if f in data.player_data.columns]
-
-        rated = round_floats(
-            data.player_data.filter(pl.col("tiered_rating") == 0).select(
-                ["player"] + available
-            )
-        )
-
-        dtypes = dict(zip(rated.columns, rated.dtypes))
-        fields = [
-            {
-                "key": f,
-                "label": label_for(f),
-                "type": type_for(f, dtypes[f]),
-                "dp": 1 if type_for(f, dtypes[f]) == "pct" else 2,
-            }
-            for f in available
-        ]
-
-        players = [
-            {
-                "n": row["player"],
-                "i": player_thumb_path(row["player"]).exists(),
-                "v": [row[f] for f in available],
-            }
-            for row in rated.to_dicts()
-        ]
-
-        cache[key] = json.dumps(
-            {"fields": fields, "players": players}, separators=(",", ":"), default=str
-        ).encode("utf-8")
-
-    return _json_response(cache[key])
+    return _json_response(_cached_bytes(_with_images("__scatter"), _scatter_payload))
 
 
-@api.route("/charts/rapm-apm")
-def chart_rapm_apm():
-    """Regularized rating against raw result-versus-expectation.
-
-    Only untiered players: a tiered rating is a group estimate, so plotting it
-    against that player's own APM would compare two different things.
-    """
-    store = current_app.config["DATA_STORE"]
-
-    def build(data):
-        return data.player_data.filter(pl.col("tiered_rating") == 0).select(
+def _rapm_apm_payload(data) -> bytes:
+    df = round_floats(
+        data.player_data.filter(pl.col("tiered_rating") == 0).select(
             ["player", "result_vs_expectation", "rating", "games_played", "win_pct"]
         )
-
-    df = round_floats(build(store.data))
-    payload = json.dumps(
+    )
+    return json.dumps(
         {
             "points": [
                 {
@@ -691,69 +1129,220 @@ def chart_rapm_apm():
         },
         separators=(",", ":"),
     ).encode("utf-8")
-    return _json_response(payload)
 
 
-@api.route("/player/<player_name>/rolling")
-def player_rolling(player_name: str):
-    """Rolling averages over a player's career, for the player-page chart."""
-    window = min(max(int(request.args.get("window", 20)), 2), 100)
-    store = current_app.config["DATA_STORE"]
+@api.route("/charts/rapm-apm")
+def chart_rapm_apm():
+    """Regularized rating against raw result-versus-expectation.
 
-    metrics = {
-        "result_vs_expectation": "Result vs expectation",
-        "other_9_players_quality_diff": "Other 9 quality diff",
-        "teammate_quality": "Teammate quality",
-        "opp_quality": "Opponent quality",
-        "winner": "Win rate",
-    }
+    Only untiered players: a tiered rating is a group estimate, so plotting it
+    against that player's own APM would compare two different things.
+    """
+    return _json_response(_cached_bytes("__rapm_apm", _rapm_apm_payload))
 
-    df = (
-        store.data.player_games.filter(pl.col("player") == player_name)
-        .sort("player_game_num")
-        .with_columns(
-            [
-                pl.col(col).rolling_mean(window_size=window).round(3).alias(col)
-                for col in metrics
-            ]
-        )
-        .select(["player_game_num", "game_date"] + list(metrics))
+
+# The rolling-averages chart's series, by their column in player_games.
+ROLLING_LABELS = {
+    "result_vs_expectation": "Result vs expectation",
+    "other_9_players_quality_diff": "Other 9 quality diff",
+    "teammate_quality": "Teammate quality",
+    "opp_quality": "Opponent quality",
+    "winner": "Win rate",
+}
+
+DEFAULT_ROLLING_WINDOW = 20
+
+
+def _rolling_payload(data, player_name: str, window: int) -> bytes:
+    # Means from the build's running totals (see artifacts.rolling_sums): the
+    # total at a game minus the total `window` games earlier, for every game
+    # at once. Games before the first full window have no mean.
+    full = pl.int_range(pl.len()) >= window - 1
+    df = data.rows_for("rolling_sums", "player", player_name).select(
+        "player_game_num",
+        "game_date",
+        *[
+            pl.when(full)
+            .then((pl.col(col) - pl.col(col).shift(window, fill_value=0)) / window)
+            .round(3)
+            .alias(col)
+            for col in ROLLING_LABELS
+        ],
     )
 
-    payload = json.dumps(
+    return json.dumps(
         {
             "window": window,
             "x": df["player_game_num"].to_list(),
             "dates": df["game_date"].to_list(),
             "series": [
                 {"name": label, "v": df[col].to_list()}
-                for col, label in metrics.items()
+                for col, label in ROLLING_LABELS.items()
             ],
         },
         separators=(",", ":"),
         default=str,
     ).encode("utf-8")
-    return _json_response(payload)
 
 
-@api.route("/player/<player_name>/rating-history")
-def player_rating_history(player_name: str):
-    """Rating over time for the player page chart.
+@api.route("/player/<player_name>/rolling")
+def player_rolling(player_name: str):
+    """Rolling averages over a player's career, for the player-page chart."""
+    try:
+        window = int(request.args.get("window", DEFAULT_ROLLING_WINDOW))
+    except ValueError:
+        return jsonify({"error": "window must be an integer"}), 400
+    window = min(max(window, 2), 100)
+    snapshot = current_app.config["DATA_STORE"].snapshot()
+    return _json_response(
+        _cached_bytes(
+            f"rolling:{player_name}:{window}",
+            lambda data: _rolling_payload(data, player_name, window),
+            snapshot,
+            persist=_known_player(snapshot[0], player_name),
+        )
+    )
 
-    Read from DuckDB, which is where the historical ratings snapshots live.
-    """
-    store = current_app.config["DATA_STORE"]
-    with store.db() as conn:
-        rows = conn.execute(
-            "SELECT date, rating FROM ratings WHERE player = ? ORDER BY date",
-            [player_name],
-        ).fetchall()
 
-    payload = json.dumps(
+def _rating_history_payload(data, player_name: str) -> bytes:
+    history = data.rows_for("ratings_history", "player", player_name)
+    return json.dumps(
         {
             "player": player_name,
-            "points": [[str(date), round(float(rating), 3)] for date, rating in rows],
+            "points": [
+                [date, round(float(rating), 3)]
+                for date, rating in history.select("date", "rating").iter_rows()
+            ],
         },
         separators=(",", ":"),
     ).encode("utf-8")
-    return _json_response(payload)
+
+
+@api.route("/player/<player_name>/rating-history")
+def player_rating_history(player_name: str):
+    """Rating over time for the player page chart.
+
+    From the ratings history exported with the artifacts, already in date
+    order within each player.
+    """
+    snapshot = current_app.config["DATA_STORE"].snapshot()
+    return _json_response(
+        _cached_bytes(
+            f"rating-history:{player_name}",
+            lambda data: _rating_history_payload(data, player_name),
+            snapshot,
+            persist=_known_player(snapshot[0], player_name),
+        )
+    )
+
+
+# -- versioned URLs --------------------------------------------------------
+
+# For responses whose URL names the build they were made from.
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Not a function of the build: the event stream, and the dispatcher itself.
+_UNVERSIONED = ("api.events", "api.versioned")
+
+# A function of the build and of the picture manifest (see _with_images), which
+# the URL doesn't name: answered under it, but revalidated as usual.
+_IMAGE_FLAGGED = ("api.search", "api.chart_player_scatter")
+
+
+def api_base(data) -> str:
+    """Where pages send their API requests for `data`: a prefix naming the
+    build when it can be named, so the answers can be cached for good."""
+    namespace = namespace_for(data)
+    return f"{api.url_prefix}/v/{namespace}" if namespace else api.url_prefix
+
+
+@api.route("/v/<version>/<path:rest>")
+def versioned(version: str, rest: str):
+    """Any endpoint above, under a prefix naming the build it describes.
+
+    Under the plain URL every tab switch costs a round trip to revalidate,
+    plus hashing the payload for its ETag. Here the URL itself changes with
+    the build, so a response can be cached by the browser, or any CDN in
+    front, for a year. The version is the disk cache namespace (see
+    namespace_for): workbook fingerprint, build time and payload format. It
+    is read from the artifacts, so it holds across restarts, and changing the
+    payload format changes the URL too.
+
+    A request naming any other build is redirected to the same path under the
+    current one, never answered from it: a page left open across a refresh
+    still gets current data, cached under the URL that matches it.
+    """
+    store = current_app.config["DATA_STORE"]
+    data, served = store.snapshot()
+    current = namespace_for(data)
+    if version != current:
+        target = f"{api_base(data)}/{quote(rest)}"
+        if request.query_string:
+            target += "?" + request.query_string.decode("latin-1")
+        response = redirect(target, code=302)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    try:
+        endpoint, args = current_app.url_map.bind_to_environ(request.environ).match(
+            f"{api.url_prefix}/{rest}", method=request.method
+        )
+    except HTTPException as exc:
+        return exc
+    if not endpoint.startswith(f"{api.name}.") or endpoint in _UNVERSIONED:
+        abort(404)
+
+    response = current_app.make_response(current_app.view_functions[endpoint](**args))
+    # A swap during the request means the view may have read the new build,
+    # which must not be cached under this one's URL.
+    if (
+        response.status_code == 200
+        and store.version == served
+        and endpoint not in _IMAGE_FLAGGED
+    ):
+        response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+
+# -- warm-up ---------------------------------------------------------------
+
+def league_payloads() -> Dict[str, Callable]:
+    """Every league-wide payload, by cache key, as a builder taking the dataset.
+
+    The keys are the ones the routes above cache under, so anything built from
+    here is what a request would have built.
+    """
+    payloads = {
+        name: (lambda data, builder=builder: _serialize(builder(data)))
+        for name, builder in DATASETS.items()
+    }
+    for name in DATASETS:
+        payloads[_first_page_key(name)] = (
+            lambda data, name=name: _first_page_payload(name, data)
+        )
+    payloads[_with_images("__search")] = _search_payload
+    payloads["__ratings_history"] = _ratings_history_payload
+    payloads[_with_images("__scatter")] = _scatter_payload
+    payloads["__rapm_apm"] = _rapm_apm_payload
+    return payloads
+
+
+def player_payloads(player_name: str) -> Dict[str, Callable]:
+    """The cached payloads a player page requests, keyed as the routes key them."""
+    payloads = {
+        f"player:{player_name}:{dataset}": (
+            lambda data, builder=builder: _serialize(builder(data, player_name))
+        )
+        for dataset, builder in PLAYER_SCOPED.items()
+    }
+    for kind in SPLIT_KINDS:
+        payloads[f"splits:{player_name}:{kind}"] = (
+            lambda data, kind=kind: _serialize(_player_splits(data, player_name, kind))
+        )
+    payloads[f"rating-history:{player_name}"] = (
+        lambda data: _rating_history_payload(data, player_name)
+    )
+    payloads[f"rolling:{player_name}:{DEFAULT_ROLLING_WINDOW}"] = (
+        lambda data: _rolling_payload(data, player_name, DEFAULT_ROLLING_WINDOW)
+    )
+    return payloads
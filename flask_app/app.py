@@ -18,17 +18,28 @@ from datetime import datetime, timedelta
 from io import BytesIO
 
 import zoneinfo
-from flask import Flask, current_app, jsonify, render_template, request
+from flask import Flask, current_app, jsonify, render_template, request, url_for
 
 import polars as pl
 
 from collective_bball import artifacts
-from collective_bball.paths import player_photo_path, player_thumb_path
-from flask_app.api import api
+from collective_bball.paths import (
+    classic_pages_dir,
+    payload_cache_dir,
+    row_manifest_dir,
+)
+from collective_bball.player_images import player_images
+from flask_app.api import IMMUTABLE, api, api_base
+from flask_app.classic_pages import ClassicPages
 from flask_app.data_store import DataStore
-from flask_app.legacy_views import legacy
+from flask_app.delta import ManifestStore, build_id
+from flask_app.events import DEFAULT_MAX_SUBSCRIBERS, EventHub, swap_event
+from flask_app.legacy_views import PLAYER_CHART_MODES, legacy, prerender_pages
+from flask_app.page_cache import PageNotFoundError, cached_page
+from flask_app.payload_cache import DEFAULT_MAX_BYTES, DiskTier, PayloadCache
 from flask_app.player_page_data_loader import load_player_bio_data
 from flask_app.refresh import DEFAULT_INTERVAL_SECONDS, RefreshService
+from flask_app.warmer import DEFAULT_TOP_PLAYERS, CacheWarmer
 
 logging.basicConfig(
     level=os.environ.get("LOG_LEVEL", "INFO"),
@@ -65,6 +76,31 @@ def create_app() -> Flask:
 
     store = DataStore(_initial_data())
     app.config["DATA_STORE"] = store
+    cache_mb = int(os.environ.get("API_CACHE_MB", DEFAULT_MAX_BYTES // (1024 * 1024)))
+    app.config["API_CACHE"] = PayloadCache(
+        max_bytes=cache_mb * 1024 * 1024, disk=DiskTier(payload_cache_dir())
+    )
+
+    app.config["ROW_MANIFESTS"] = ManifestStore(row_manifest_dir())
+
+    warmer = CacheWarmer(
+        app.config["API_CACHE"],
+        store,
+        top_players=int(os.environ.get("WARM_TOP_PLAYERS", DEFAULT_TOP_PLAYERS)),
+        manifests=app.config["ROW_MANIFESTS"],
+    )
+    app.config["CACHE_WARMER"] = warmer
+    store.set_warmer(warmer.warm)
+    warmer.start()
+
+    hub = EventHub(
+        max_subscribers=int(
+            os.environ.get("EVENTS_MAX_SUBSCRIBERS", DEFAULT_MAX_SUBSCRIBERS)
+        )
+    )
+    app.config["EVENT_HUB"] = hub
+    hub.publish(swap_event(*store.snapshot()))
+    store.add_listener(lambda data, version: hub.publish(swap_event(data, version)))
 
     interval = int(
         os.environ.get("REFRESH_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS)
@@ -74,35 +110,86 @@ def create_app() -> Flask:
     if os.environ.get("DISABLE_AUTO_REFRESH", "").lower() not in ("1", "true", "yes"):
         refresh_service.start()
 
+    classic = ClassicPages(classic_pages_dir())
+    app.config["CLASSIC_PAGES"] = classic
+    charts = os.environ.get("CLASSIC_PLAYER_CHARTS", "plotly").lower()
+    if charts not in PLAYER_CHART_MODES:
+        raise ValueError(
+            f"CLASSIC_PLAYER_CHARTS must be one of {', '.join(PLAYER_CHART_MODES)}"
+        )
+    app.config["CLASSIC_PLAYER_CHARTS"] = charts
+
+    def prerender_classic(data, version):
+        # Every player, the most viewed first, so a visit rarely waits on
+        # Plotly.
+        players = warmer.most_viewed(data)
+        first = set(players)
+        players += [
+            name for name in data.player_data["player"].to_list() if name not in first
+        ]
+        with app.app_context():
+            pages = prerender_pages(data, version, players)
+        classic.prerender(app, store, data, version, pages)
+
+    store.add_listener(prerender_classic)
+
     app.register_blueprint(legacy)
     app.register_blueprint(api)
     _register_routes(app)
 
     @app.context_processor
     def inject_globals():
-        """Every page embeds the set of players who have a thumbnail, so tables
-        can render avatars without probing for images that would 404."""
-        return {"thumb_players": _players_with_thumbs(app.config["DATA_STORE"])}
+        """Every page embeds the players who have a thumbnail, with each one's
+        content hash, so tables can render avatars without probing for images
+        that would 404, and the build it was rendered from, so it can tell
+        when a newer one is pushed. API URLs are prefixed with `api_base`,
+        which names that build."""
+        store = app.config["DATA_STORE"]
+        return {
+            "thumb_hashes": player_images.thumb_hashes(),
+            "thumb_url": lambda player: _image_url(player_images.thumb(player)),
+            "photo_url": lambda player: _image_url(player_images.photo(player)),
+            "photo_sources": _photo_sources,
+            "data_build": build_id(store.data),
+            "api_base": api_base(store.data),
+        }
 
-    return app
+    @app.after_request
+    def cache_versioned_images(response):
+        """A picture asked for by content hash (see _image_url) never changes."""
+        if (
+            request.endpoint == "static"
+            and request.args.get("v")
+            and response.status_code in (200, 304)
+        ):
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
 
+    # Last: rendering needs the routes and context processor above.
+    prerender_classic(*store.snapshot())
 
-def _players_with_thumbs(store) -> list:
-    """Cached per data version; a directory scan per request would be wasteful."""
-    cached = _players_with_thumbs.cache
-    if cached.get("version") == store.version:
-        return cached["names"]
+    return app
 
-    names = sorted(
-        name
-        for name in store.data.player_data["player"].to_list()
-        if player_thumb_path(name).exists()
-    )
-    _players_with_thumbs.cache = {"version": store.version, "names": names}
-    return names
 
+def _photo_sources(player: str) -> list:
+    """`<source>`s for a player's photo: a srcset of its resized copies per
+    format, best compressed first. Empty without the thumbnail script's
+    copies, in which case the page falls back to the original."""
+    sources = []
+    for fmt in ("avif", "webp"):
+        variants = player_images.photo_variants(player, fmt)
+        if variants:
+            srcset = ", ".join(f"{_image_url(v)} {v['width']}w" for v in variants)
+            sources.append({"type": f"image/{fmt}", "srcset": srcset})
+    return sources
 
-_players_with_thumbs.cache = {}
+
+def _image_url(image) -> str:
+    """URL of a player picture from the manifest (see player_images.py),
+    carrying its content hash so browsers can keep it."""
+    if image is None:
+        return ""
+    return url_for("static", filename=image["path"], v=image["hash"])
 
 
 def _require_password() -> bool:
@@ -118,7 +205,9 @@ def _register_routes(app: Flask) -> None:
 
     @app.route("/")
     def home():
-        data = current_app.config["DATA_STORE"].data
+        return cached_page("home", _render_home, day=datetime.now(EASTERN).date())
+
+    def _render_home(data) -> str:
         latest = data.meta.get("latest_game_date")
         top = data.player_data.sort("rating", descending=True, nulls_last=True).row(
             0, named=True
@@ -142,7 +231,7 @@ def _register_routes(app: Flask) -> None:
             "num_players": data.player_data.height,
             "active_players": int(data.player_data["active_player"].sum() or 0),
             "latest_date": latest,
-            "latest_games": data.games.filter(pl.col("game_date") == latest).height,
+            "latest_games": data.rows_for("games", "game_date", latest).height,
             "top_player": top["player"],
             "top_rating": top["rating"],
             "recent_leader": recent_leader["player"] if recent_leader else None,
@@ -156,10 +245,19 @@ def _register_routes(app: Flask) -> None:
 
     @app.route("/player/<player_name>")
     def player_page(player_name):
-        data = current_app.config["DATA_STORE"].data
-        rows = data.player_data.filter(pl.col("player") == player_name)
-        if rows.is_empty():
+        try:
+            page = cached_page(
+                f"player:{player_name}", lambda data: _render_player(data, player_name)
+            )
+        except PageNotFoundError:
             return render_template("not_found.html", thing=player_name), 404
+        current_app.config["CACHE_WARMER"].record_view(player_name)
+        return page
+
+    def _render_player(data, player_name: str) -> str:
+        rows = data.rows_for("player_data", "player", player_name)
+        if rows.is_empty():
+            raise PageNotFoundError(player_name)
 
         row = rows.row(0, named=True)
         full_name, height_str, position, birthday = load_player_bio_data(
@@ -171,13 +269,12 @@ def _register_routes(app: Flask) -> None:
         # individually-fitted ratings would be misleading.
         rating_rank = None
         if row.get("rating") is not None and not row.get("tiered_rating"):
-            rated = data.player_data.filter(pl.col("tiered_rating") == 0)[
-                "rating"
-            ].to_list()
-            rating_rank = {
-                "rank": ordinal(_rank_of(rated, row["rating"])),
-                "total": len(rated),
-            }
+            ranks = data.rows_for("player_ranks", "player", player_name)
+            if not ranks.is_empty() and ranks["rating_rank"][0] is not None:
+                rating_rank = {
+                    "rank": ordinal(ranks["rating_rank"][0]),
+                    "total": ranks["rating_total"][0],
+                }
 
         return render_template(
             "player.html",
@@ -191,7 +288,7 @@ def _register_routes(app: Flask) -> None:
             profile=_player_profile(
                 data.player_data, row, _player_awards(data.days, player_name)
             ),
-            image_exists=player_photo_path(player_name).exists(),
+            image_exists=player_images.has_photo(player_name),
             stats={
                 # Withheld for tiered players: the number is their tier's.
                 "rating": None if row.get("tiered_rating") else row.get("rating"),
@@ -210,30 +307,30 @@ def _register_routes(app: Flask) -> None:
 
     @app.route("/date/<date>")
     def date_page(date):
-        data = current_app.config["DATA_STORE"].data
-        day_rows = data.days.filter(pl.col("game_date") == date)
-        if day_rows.is_empty():
+        try:
+            return cached_page(f"date:{date}", lambda data: _render_date(data, date))
+        except PageNotFoundError:
             return render_template("not_found.html", thing=date), 404
 
-        # Neighboring runs, for the prev/next links.
-        all_dates = data.days["game_date"].sort().to_list()
-        index = all_dates.index(date)
+    def _render_date(data, date: str) -> str:
+        day_rows = data.rows_for("days", "game_date", date)
+        if day_rows.is_empty():
+            raise PageNotFoundError(date)
 
         day = day_rows.row(0, named=True)
+        # Neighboring runs and rankings, derived on load (see rank_frames).
+        ranks = data.rows_for("day_ranks", "game_date", date).row(0, named=True)
 
         # How strong this run was relative to every other, both per player and
         # weighted by games played.
         def rank_badge(column):
-            values = data.days[column].to_list()
-            total = len([v for v in values if v is not None])
-            if day[column] is None or total < 2:
+            if ranks.get(f"{column}_pct") is None or day[column] is None:
                 return None
-            rank = _rank_of(values, day[column])
             return {
-                "rank": ordinal(rank),
-                "total": total,
+                "rank": ordinal(ranks[f"{column}_rank"]),
+                "total": ranks[f"{column}_total"],
                 # 0 = worst run, 1 = best. Drives the red-to-green scale.
-                "pct": (total - rank) / (total - 1),
+                "pct": ranks[f"{column}_pct"],
             }
 
         return render_template(
@@ -243,13 +340,15 @@ def _register_routes(app: Flask) -> None:
             day_of_week=day["day"],
             weighted_rank=rank_badge("mean_rating_player_games"),
             avg_rank=rank_badge("mean_rating_players"),
-            prev_date=all_dates[index - 1] if index > 0 else None,
-            next_date=all_dates[index + 1] if index < len(all_dates) - 1 else None,
+            prev_date=ranks["prev_date"],
+            next_date=ranks["next_date"],
         )
 
     @app.route("/team-builder")
     def team_builder():
-        data = current_app.config["DATA_STORE"].data
+        return cached_page("team-builder", _render_team_builder)
+
+    def _render_team_builder(data) -> str:
         roster = (
             data.player_data.select(["player", "rating", "games_played"])
             .drop_nulls("rating")
@@ -265,7 +364,11 @@ def _register_routes(app: Flask) -> None:
 
     @app.route("/birthdays")
     def birthdays_page():
-        data = current_app.config["DATA_STORE"].data
+        return cached_page(
+            "birthdays", _render_birthdays, day=datetime.now(EASTERN).date()
+        )
+
+    def _render_birthdays(data) -> str:
         rows = _birthday_rows(data)
         today = datetime.now(EASTERN).date()
 
@@ -318,10 +421,13 @@ def _register_routes(app: Flask) -> None:
     def admin_reload():
         """Swap in artifacts rebuilt by another process.
 
-        Unauthenticated on purpose: it only re-reads files this app already
-        owns and exposes nothing new. Handy after a CLI rebuild during local
-        development, where restarting the server is the only alternative.
+        Handy after a CLI rebuild during local development, where restarting
+        the server is the only alternative. Password-protected like the other
+        admin actions: each reload sets off a cache warm-up and a classic
+        pre-render, which anyone could otherwise trigger over and over.
         """
+        if not _require_password():
+            return jsonify({"error": "unauthorized"}), 401
         service = current_app.config["REFRESH_SERVICE"]
         return jsonify(service.reload_if_artifacts_changed())
 
@@ -557,12 +663,6 @@ def ordinal(n: int) -> str:
     return f"{n}{_ordinal_suffix(n)}"
 
 
-def _rank_of(values: list, target, descending: bool = True) -> int:
-    """1-based rank of `target` within `values`, highest first by default."""
-    ordered = sorted((v for v in values if v is not None), reverse=descending)
-    return ordered.index(target) + 1
-
-
 def _ordinal_suffix(n: int) -> str:
     if n % 10 == 1 and n % 100 != 11:
         return "st"
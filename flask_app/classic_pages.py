@@ -0,0 +1,187 @@
+"""
+The classic site's pages, rendered once per build and served as files.
+
+The classic home page is one ~67 MB template. Its tables used to be kept as
+Python dicts for the version being served, but rendering them still took over
+two seconds a visit, and building them made the first visitor after each swap
+wait longer still. Now each page is rendered once, gzipped, and written to
+disk; every view after that is a send_file of a ~4 MB file.
+
+Pages are filed in one directory per artifact build, like the payload cache's
+disk tier, so a restart against the same artifacts serves them straight away.
+The directory is also named after the code and templates that render the
+pages and the picture manifest they link into, so a deploy that changes
+either renders afresh. The last BUILDS_KEPT directories are kept.
+
+After each swap, and at boot, a background thread renders the home page, every
+date page and every player's page, the most viewed players first. Player
+pages cost a few hundred milliseconds of Plotly each, so the thread rests
+between pages for as long as the last one took and leaves at least half the
+CPU to visitors. A page not rendered yet is rendered by its first visitor. A
+page is rendered by one thread at a time; a visitor arriving mid-render waits
+for it rather than repeating it.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from flask import Response, request, send_file
+
+from collective_bball.player_images import player_images
+from flask_app.payload_cache import namespace_for
+
+logger = logging.getLogger(__name__)
+
+BUILDS_KEPT = 2
+
+GZIP_LEVEL = 6
+
+# The longest the prerender thread rests between two pages, in seconds.
+MAX_PAUSE = 1.0
+
+_APP_DIR = Path(__file__).resolve().parent
+
+# Everything besides the dataset that a classic page's HTML depends on.
+_SOURCES = (
+    sorted((_APP_DIR / "templates" / "legacy").glob("*.html"))
+    + [
+        _APP_DIR / "legacy_views.py",
+        _APP_DIR / "web_data_loader.py",
+        _APP_DIR / "player_page_data_loader.py",
+        _APP_DIR / "utility_imports" / "tooltips.py",
+    ]
+)
+
+
+def _source_stamp() -> str:
+    digest = hashlib.sha1(str(player_images.revision).encode("utf-8"))
+    for path in _SOURCES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:8]
+
+
+class ClassicPages:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        # Per page file: its lock, and how many threads hold or wait on it.
+        self._locks: Dict[str, list] = {}
+        self._locks_lock = threading.Lock()
+        self._stamp: Optional[tuple] = None
+
+    def _directory(self, data) -> Optional[Path]:
+        namespace = namespace_for(data)
+        if not namespace:
+            return None
+        revision = player_images.revision
+        if self._stamp is None or self._stamp[0] != revision:
+            self._stamp = (revision, _source_stamp())
+        return self.root / f"{namespace}-{self._stamp[1]}"
+
+    @contextmanager
+    def _locked(self, path: Path):
+        """Hold `path`'s lock. The entry is dropped once no thread holds or
+        waits on it, so one page is never rendered by two threads at once, a
+        failed render included, and the dict doesn't grow with every page."""
+        with self._locks_lock:
+            entry = self._locks.setdefault(str(path), [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[str(path)]
+
+    def ensure(self, data, page: str, render: Callable[[], str]) -> Optional[Path]:
+        """The file holding `page` for `data`'s build, rendered first if it
+        doesn't exist. None when the build can't be identified."""
+        directory = self._directory(data)
+        if directory is None:
+            return None
+        name = hashlib.sha1(page.encode("utf-8")).hexdigest()[:20] + ".html.gz"
+        path = directory / name
+        if path.exists():
+            return path
+        with self._locked(path):
+            if not path.exists():
+                html = render()
+                try:
+                    directory.mkdir(parents=True)
+                    self._prune(keep=directory)
+                except FileExistsError:
+                    pass
+                # Named for this thread: other workers sharing the directory
+                # may be writing the same page.
+                staging = path.with_name(
+                    f"{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+                )
+                staging.write_bytes(gzip.compress(html.encode("utf-8"), GZIP_LEVEL))
+                os.replace(staging, path)
+        return path
+
+    def serve(self, data, page: str, render: Callable[[], str]) -> Response:
+        """Respond with `page`, from its file when possible."""
+        try:
+            path = self.ensure(data, page, render)
+        except OSError as exc:
+            # Best effort, like the payload cache's disk tier.
+            logger.warning("Could not write classic page %s: %s", page, exc)
+            path = None
+        if path is None:
+            return Response(render(), mimetype="text/html")
+
+        if "gzip" in request.accept_encodings:
+            response = send_file(path, mimetype="text/html")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(gzip.decompress(path.read_bytes()), mimetype="text/html")
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def prerender(self, app, store, data, version: int, pages: Dict[str, Callable]) -> None:
+        """Render `pages` ({page: render(data)}) for `data` on a background
+        thread, giving up if another version is swapped in meanwhile."""
+
+        def run():
+            started = time.time()
+            rendered = 0
+            with app.test_request_context("/classic/"):
+                for page, render in pages.items():
+                    if store.version != version:
+                        logger.info("Classic pages for version %d superseded", version)
+                        return
+                    began = time.time()
+                    try:
+                        self.ensure(data, page, lambda render=render: render(data))
+                        rendered += 1
+                    except Exception:
+                        logger.exception("Rendering classic page %s failed", page)
+                    time.sleep(min(time.time() - began, MAX_PAUSE))
+            logger.info(
+                "Classic pages ready for version %d: %d in %.1fs",
+                version,
+                rendered,
+                time.time() - started,
+            )
+
+        threading.Thread(target=run, name="classic-pages", daemon=True).start()
+
+    def _prune(self, keep: Path) -> None:
+        """Delete all but the newest builds. Called when a new one appears."""
+        others = sorted(
+            (p for p in self.root.iterdir() if p.is_dir() and p != keep),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in others[BUILDS_KEPT - 1:]:
+            shutil.rmtree(stale, ignore_errors=True)
@@ -7,59 +7,137 @@ produces a brand new object and `swap()` rebinds a single reference under a
 lock. In-flight requests finish against the old object and are garbage
 collected normally.
 
-`version` increments on every swap. Anything caching derived state keys on it.
+`swap()` only hands the new dataset to one background worker and returns, so
+whoever called it (the refresh thread, or the request thread of /upload or
+/admin/reload) gets its answer straight away. The worker first runs the
+warmer, which pre-builds cached payloads for the incoming dataset, and only
+then publishes it, so the first visitors after a swap aren't the ones who pay
+for it: the old dataset keeps being served until the warm-up finishes, and the
+switch is still a single rebinding. Listeners run once it has been published;
+the event stream announces swaps to open pages through one (see events.py).
+If another swap arrives meanwhile, the worker abandons the older dataset
+without publishing it and moves on to the newest: warming or serving data
+that is already out of date is wasted work.
+
+`version` increments on every swap. Anything caching derived state keys on it,
+and should read both through `snapshot()` so the pair always matches.
 """
 
+import logging
 import threading
 from contextlib import contextmanager
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
-import duckdb
+from collective_bball import database
 
-from collective_bball.paths import db_path
+logger = logging.getLogger(__name__)
 
 
 class DataStore:
     def __init__(self, data):
-        self._data = data
-        self._version = 1
+        # Data and version are rebound together as one tuple, so a reader can
+        # never pair the new dataset with the old version number or vice versa.
+        self._current = (data, 1)
         self._lock = threading.Lock()
-        self._conn: Optional[duckdb.DuckDBPyConnection] = None
-        self._conn_lock = threading.Lock()
+        # The version given to the latest swap, published or not yet.
+        self._latest = 1
+        self._warmer: Optional[Callable] = None
+        self._listeners: List[Callable] = []
+        # The latest swap the worker hasn't picked up yet.
+        self._pending: Optional[Tuple[object, int]] = None
+        self._wake = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
 
     @property
     def data(self):
         """Current dataset. Read without a lock: rebinding a reference is
         atomic under the GIL, and each rebuild yields a fresh object."""
-        return self._data
+        return self._current[0]
 
     @property
     def version(self) -> int:
-        return self._version
+        return self._current[1]
+
+    def snapshot(self) -> Tuple[object, int]:
+        """The dataset and the version it was published under, read at once."""
+        return self._current
+
+    def superseded(self, version: int) -> bool:
+        """Whether a later swap than the one given `version` has arrived."""
+        return self._latest != version
+
+    def set_warmer(self, warmer: Optional[Callable]) -> None:
+        """`warmer(data, version)` runs on the worker for every swap, before
+        publishing. It should stop early once `version` is superseded."""
+        self._warmer = warmer
+
+    def add_listener(self, listener: Callable) -> None:
+        """`listener(data, version)` runs on the worker after every publish."""
+        self._listeners.append(listener)
 
     def swap(self, new_data) -> int:
-        """Replace the dataset and bump the version. Returns the new version."""
+        """Replace the dataset and bump the version. Returns the new version.
+
+        The dataset is published under it on the worker, once warmed; until
+        then the old one is served. Unless a later swap arrives first, in
+        which case it never is.
+        """
         with self._lock:
-            self._data = new_data
-            self._version += 1
-            return self._version
+            self._latest += 1
+            version = self._latest
+
+        with self._wake:
+            self._pending = (new_data, version)
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._work, name="swap-worker", daemon=True
+                )
+                self._worker.start()
+            self._wake.notify()
+        return version
+
+    def _work(self) -> None:
+        while True:
+            with self._wake:
+                while self._pending is None:
+                    self._wake.wait()
+                data, version = self._pending
+                self._pending = None
+            self._after_swap(data, version)
+
+    def _after_swap(self, data, version: int) -> None:
+        """Warm `data`'s caches, publish it, then tell the listeners, unless
+        a later swap arrives along the way. A warm-up that fails is logged and
+        the swap goes ahead: stale caches are better than stale data."""
+        if self._warmer is not None:
+            try:
+                self._warmer(data, version)
+            except Exception:
+                logger.exception("Cache warm-up for version %d failed", version)
+
+        with self._lock:
+            if self.superseded(version):
+                logger.info("Swap to version %d superseded before publishing", version)
+                return
+            self._current = (data, version)
+
+        for listener in self._listeners:
+            if self.version != version:
+                logger.info("Swap to version %d superseded", version)
+                return
+            try:
+                listener(data, version)
+            except Exception:
+                logger.exception("Swap listener for version %d failed", version)
 
     @contextmanager
     def db(self):
-        """Open a DuckDB connection for the duration of one operation.
+        """A read-only DuckDB cursor for the duration of one operation.
 
-        Serialized, because DuckDB permits a single read-write handle per file
-        and the scheduled rebuild writes while pages are being served.
-
-        Deliberately opened and closed per use rather than held for the
-        lifetime of the process. A long-lived handle keeps the file locked, so
-        a rebuild from the CLI — `python -m collective_bball.main` — fails with
-        "Could not set lock on file" for as long as any server is running.
-        Holding it saved a millisecond and cost the ability to rebuild.
+        Reads a snapshot of the database rather than the file the build
+        writes, so any number can run at once and none of them blocks, or is
+        blocked by, a rebuild from the CLI. Writes go through
+        database.writer(), which only the build uses.
         """
-        with self._conn_lock:
-            conn = duckdb.connect(str(db_path()))
-            try:
-                yield conn
-            finally:
-                conn.close()
+        with database.reader() as conn:
+            yield conn
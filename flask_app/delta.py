@@ -0,0 +1,162 @@
+"""
+Row-level differences between artifact builds.
+
+Every refresh replaces every table, so a client holding the Games table had to
+download the whole history again to pick up one new game. A client that
+remembers which build its copy came from can instead ask for
+`/api/table/<name>?since=<build>` and get back only the rows inserted, changed
+or deleted since, which it patches into what it has.
+
+A build is named by its workbook fingerprint and build time (see `build_id`),
+sent with every table response as the X-Data-Build header. Diffing needs to
+know what the old build's rows were, long after its dataset has been dropped,
+so each build leaves behind a manifest: for every league table, each row's key
+and a hash of its values. Manifests are written the first time a build is
+served, by the warmer, and the last MANIFESTS_KEPT are kept. A diff is then a
+join of two small hash tables; neither build's rows are read.
+
+Hashes are of the rounded frame, i.e. of the values a client was actually
+sent. Polars only promises stable hashes within one version, so manifests are
+filed per Polars version and an upgrade starts the history afresh.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+# The columns identifying a row of each league table across builds.
+ROW_KEYS: Dict[str, Tuple[str, ...]] = {
+    "stats": ("player",),
+    "ratings": ("player",),
+    "games": ("game_date", "game_num"),
+    "player_days": ("player", "game_date"),
+    "teammates": ("pairing",),
+    "opponents": ("player", "opponent"),
+    "days": ("game_date",),
+    "days_of_week": ("day",),
+}
+
+# Builds a client can sync from. A refresh runs every few minutes at most, so
+# this covers a tab left open for an afternoon; older clients reload the table.
+MANIFESTS_KEPT = 12
+
+_HASHER = f"polars-{pl.__version__}"
+
+_BUILD_ID = re.compile(r"[0-9a-f]{16}")
+
+
+class StaleBuildError(ValueError):
+    """Raised when a table can't be diffed against the build a client names."""
+
+
+def build_id(data) -> str:
+    """Names the build a dataset came from. Empty when it can't be identified.
+
+    The workbook fingerprint alone isn't enough: a forced rebuild of the same
+    workbook refits the model, and its rows needn't hash the same.
+    """
+    fingerprint = getattr(data, "source_fingerprint", "")
+    if not fingerprint:
+        return ""
+    stamp = f"{fingerprint}:{getattr(data, 'built_at', '')}"
+    return hashlib.sha1(stamp.encode("utf-8")).hexdigest()[:16]
+
+
+def is_build_id(value: str) -> bool:
+    return bool(_BUILD_ID.fullmatch(value))
+
+
+def row_key(table: str) -> pl.Expr:
+    """Each row's key as JSON text, e.g. {"game_date":"2025-01-06","game_num":3}."""
+    return pl.struct(ROW_KEYS[table]).struct.json_encode().alias("key")
+
+
+def table_manifest(table: str, frame: pl.DataFrame) -> pl.DataFrame:
+    """Key and value hash of every row of one (rounded) league table."""
+    return frame.select(
+        pl.lit(table).alias("table"),
+        pl.lit(",".join(frame.columns)).alias("columns"),
+        row_key(table),
+        pl.struct(pl.all()).hash(seed=0).alias("row"),
+    )
+
+
+def diff(old: pl.DataFrame, new: pl.DataFrame, table: str) -> Tuple[pl.Series, List[list]]:
+    """Keys of the rows to upsert, and key values of the rows to delete,
+    taking `table` from the `old` manifest to the `new` one."""
+    old = old.filter(pl.col("table") == table)
+    new = new.filter(pl.col("table") == table)
+    if old.is_empty() or old["columns"][0] != new["columns"][0]:
+        # Patching rows can't add or remove a column.
+        raise StaleBuildError(f"'{table}' has changed shape since that build")
+
+    upserts = (
+        new.join(old.select("key", pl.col("row").alias("was")), on="key", how="left")
+        .filter(pl.col("was").is_null() | (pl.col("row") != pl.col("was")))
+        .get_column("key")
+    )
+    deleted = old.join(new, on="key", how="anti").get_column("key")
+    deletes = deleted.str.json_decode().struct.unnest().rows() if deleted.len() else []
+    return upserts, [list(values) for values in deletes]
+
+
+class ManifestStore:
+    """Manifests on disk, one parquet file per build."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root) / _HASHER
+        # The served build's manifest is needed for every diff; keep it.
+        self._current: Optional[Tuple[str, pl.DataFrame]] = None
+        self._lock = threading.Lock()
+
+    def _path(self, build: str) -> Path:
+        return self.root / f"{build}.parquet"
+
+    def get(self, build: str) -> Optional[pl.DataFrame]:
+        if not is_build_id(build):
+            return None
+        current = self._current
+        if current is not None and current[0] == build:
+            return current[1]
+        try:
+            return pl.read_parquet(self._path(build))
+        except (OSError, pl.exceptions.ComputeError):
+            return None
+
+    def ensure(self, build: str, make: Callable[[], pl.DataFrame]) -> pl.DataFrame:
+        """The manifest for `build`, made and written if it doesn't exist yet.
+
+        Becomes the one kept in memory: ensure() is called for the build being
+        served, or about to be.
+        """
+        manifest = self.get(build)
+        if manifest is None:
+            manifest = make()
+            self._put(build, manifest)
+        self._current = (build, manifest)
+        return manifest
+
+    def _put(self, build: str, manifest: pl.DataFrame) -> None:
+        # Best effort, like the payload cache's disk tier: without it clients
+        # of this build reload their tables after the next refresh.
+        try:
+            with self._lock:
+                self.root.mkdir(parents=True, exist_ok=True)
+                staging = self._path(build).with_suffix(".tmp")
+                manifest.write_parquet(staging)
+                os.replace(staging, self._path(build))
+                stale = sorted(
+                    self.root.glob("*.parquet"), key=lambda p: p.stat().st_mtime
+                )[:-MANIFESTS_KEPT]
+                for path in stale:
+                    path.unlink()
+        except OSError as exc:
+            logger.warning("Could not persist the row manifest for %s: %s", build, exc)
@@ -0,0 +1,95 @@
+"""
+Thinning the ratings-history chart to a point budget.
+
+The chart sends a value for every player on every snapshot date. That is
+players × dates, and both only grow: a few seasons of daily snapshots would
+be megabytes of JSON drawn into a few hundred pixels. `/api/charts/ratings-
+history` now sends at most `?points=` dates (DEFAULT_POINTS without one),
+optionally only those between `?from=` and `?to=`, for a chart zoomed in.
+
+Dates are picked by Largest-Triangle-Three-Buckets: the window is cut into
+as many buckets as the budget allows, the first and last dates are always
+kept, and from each bucket the date kept is the one whose points form the
+largest triangles with the date kept before it and the average of the next
+bucket. That keeps the peaks and dips a straight stride would step over.
+
+The chart's dates are one axis shared by every series, and the payload keeps
+that shape, so the front end draws it unchanged. The triangles are therefore
+summed over every series with a value at all three corners, and one date is
+kept for all of them rather than one per player.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+DEFAULT_POINTS = 400
+MIN_POINTS = 3
+MAX_POINTS = 2000
+
+
+def _bucket_means(series: List[list], lo: int, hi: int) -> List[Optional[float]]:
+    """Each series' mean over [lo, hi), None where it has no values there."""
+    means = []
+    for values in series:
+        present = [v for v in values[lo:hi] if v is not None]
+        means.append(sum(present) / len(present) if present else None)
+    return means
+
+
+def lttb_indices(series: List[list], lo: int, hi: int, budget: int) -> List[int]:
+    """At most `budget` positions in [lo, hi) to keep, in order (see above)."""
+    count = hi - lo
+    if count <= budget:
+        return list(range(lo, hi))
+
+    kept = [lo]
+    step = (count - 2) / (budget - 2)
+    for bucket in range(budget - 2):
+        start = lo + 1 + int(bucket * step)
+        end = lo + 1 + int((bucket + 1) * step)
+        if bucket == budget - 3:
+            # The next "bucket" is the last date, kept as it is.
+            next_x, next_y = hi - 1, [values[hi - 1] for values in series]
+        else:
+            next_end = min(lo + 1 + int((bucket + 2) * step), hi - 1)
+            next_x = (end + next_end - 1) / 2
+            next_y = _bucket_means(series, end, next_end)
+
+        prev = kept[-1]
+        best, best_area = start, -1.0
+        for x in range(start, end):
+            area = 0.0
+            for values, target in zip(series, next_y):
+                y, prev_y = values[x], values[prev]
+                if y is None or prev_y is None or target is None:
+                    continue
+                area += abs(
+                    (prev - next_x) * (y - prev_y) - (prev - x) * (target - prev_y)
+                )
+            if area > best_area:
+                best, best_area = x, area
+        kept.append(best)
+    kept.append(hi - 1)
+    return kept
+
+
+def window(dates: List[str], start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+    """The slice [lo, hi) of sorted ISO `dates` from `start` to `end`, inclusive.
+    Either may be None for an open end."""
+    lo = bisect_left(dates, start) if start else 0
+    hi = bisect_right(dates, end) if end else len(dates)
+    return lo, max(hi, lo)
+
+
+def downsample(chart: dict, points: int, lo: int, hi: int) -> dict:
+    """`chart` ({"dates", "series"}) cut to its dates [lo, hi) and thinned to
+    at most `points` of them. Series with no value left are dropped."""
+    series = [entry["v"] for entry in chart["series"]]
+    keep = lttb_indices(series, lo, hi, points)
+
+    thinned = []
+    for entry in chart["series"]:
+        values = [entry["v"][i] for i in keep]
+        if any(v is not None for v in values):
+            thinned.append({"name": entry["name"], "v": values})
+    return {"dates": [chart["dates"][i] for i in keep], "series": thinned}
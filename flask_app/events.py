@@ -0,0 +1,141 @@
+"""
+Server-sent events announcing dataset swaps.
+
+Browsers only learned about new data by reloading. Now a page holding tables
+listens on `/api/events`, and every DataStore.swap() pushes one `swap` event
+naming the build being served; the page refetches its open tables then, and
+only then.
+
+A stream holds a request thread for as long as it is open. Under the sync
+worker that would have been the server's only thread, so gunicorn runs the
+gthread worker instead (see gunicorn.conf.py), and the hub keeps streams to
+a bounded share of its threads: past `max_subscribers`, `/api/events` answers
+503 and the page carries on without live updates. A stream's slot is taken in
+the same step as the check, so connections arriving together can't overshoot,
+and given back when the server closes the response, however it ends. Streams end after
+STREAM_SECONDS and the browser reconnects on its own, so threads turn over
+and a tab's connection never keeps a deploy waiting for long. Between events
+a comment line every HEARTBEAT_SECONDS keeps proxies from timing the stream
+out, and is how a closed tab is noticed.
+
+Each event's id is the build, so a browser reconnecting with Last-Event-ID
+is only sent an event when the build has changed in the meantime.
+"""
+
+import json
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+from flask_app.api import api_base
+from flask_app.delta import build_id
+
+DEFAULT_MAX_SUBSCRIBERS = 8
+
+HEARTBEAT_SECONDS = 20
+STREAM_SECONDS = 5 * 60
+
+# How long the browser waits before reconnecting, once a stream ends.
+RETRY_MS = 3000
+
+
+def swap_event(data, version: int) -> dict:
+    """What a swap announces. `build` is what `/api/table?since=` takes, and
+    `api` the prefix that build's versioned URLs live under."""
+    meta = getattr(data, "meta", {}) or {}
+    return {
+        "version": version,
+        "build": build_id(data),
+        "api": api_base(data),
+        "fingerprint": getattr(data, "source_fingerprint", ""),
+        "latest_game_date": meta.get("latest_game_date"),
+    }
+
+
+def _format(event_id: str, data: str) -> str:
+    return f"id: {event_id}\nevent: swap\ndata: {data}\n\n"
+
+
+class _Subscription:
+    """A stream holding one of the hub's slots until the server closes it.
+
+    WSGI servers call close() on every response iterable, whether it ran to
+    the end, raised, or was never read at all; a generator's own finally
+    block only runs if it was started.
+    """
+
+    def __init__(self, hub: "EventHub", events: Iterator[str]):
+        self._hub = hub
+        self._events = events
+        self._open = True
+
+    def __iter__(self) -> "_Subscription":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._events)
+
+    def close(self) -> None:
+        self._events.close()
+        if self._open:
+            self._open = False
+            self._hub._release()
+
+
+class EventHub:
+    def __init__(self, max_subscribers: int = DEFAULT_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._changed = threading.Condition()
+        self._serial = 0
+        self._latest: Optional[Tuple[str, str]] = None
+        self._subscribers = 0
+
+    def publish(self, event: dict) -> None:
+        """Announce `event` (see swap_event) to every open stream."""
+        with self._changed:
+            self._serial += 1
+            self._latest = (event["build"], json.dumps(event, separators=(",", ":")))
+            self._changed.notify_all()
+
+    @property
+    def full(self) -> bool:
+        return self._subscribers >= self.max_subscribers
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional[_Subscription]:
+        """One subscriber's stream: the current build first, unless it is
+        `last_event_id`, then each swap as it happens. None when every slot
+        is taken; otherwise the slot is held until the stream is closed."""
+        with self._changed:
+            if self._subscribers >= self.max_subscribers:
+                return None
+            self._subscribers += 1
+            seen, latest = self._serial, self._latest
+        return _Subscription(self, self._events(last_event_id, seen, latest))
+
+    def _release(self) -> None:
+        with self._changed:
+            self._subscribers -= 1
+
+    def _events(
+        self, last_event_id: Optional[str], seen: int, latest: Optional[Tuple[str, str]]
+    ) -> Iterator[str]:
+        yield f"retry: {RETRY_MS}\n\n"
+        if latest is not None and latest[0] != last_event_id:
+            yield _format(*latest)
+
+        deadline = time.monotonic() + STREAM_SECONDS
+        while time.monotonic() < deadline:
+            with self._changed:
+                self._changed.wait_for(
+                    lambda: self._serial != seen, timeout=HEARTBEAT_SECONDS
+                )
+                serial, latest = self._serial, self._latest
+            if serial != seen:
+                seen = serial
+                yield _format(*latest)
+            else:
+                yield ": keep-alive\n\n"
@@ -4,11 +4,27 @@ The original Naismith Nerds site, preserved verbatim at /classic.
 This is the version Jason Gardner designed and built solo between January 2025
 and July 2026, before any agentic coding. The templates under
 templates/legacy/ and the stylesheets/scripts under static/css/styles.css and
-static/js/ are unchanged from that build; the only edits were namespacing
-url_for() endpoints onto this blueprint so the two sites can coexist.
+static/js/ are unchanged from that build, but for namespacing url_for()
+endpoints onto this blueprint so the two sites can coexist, and the changes
+listed below.
 
 The exact pre-agentic source is pinned at the git tag `v1-solo-build`.
 
+Those were made on purpose, each to serve the same page faster without
+changing what it shows:
+
+- Image URLs come from thumb_url()/photo_url(), which read the picture
+  manifest and carry a content hash, instead of from fixed paths; that lets
+  browsers keep the pictures, and no request probes the disk for them.
+- legacy/player.html wraps the photo in a <picture> offering the resized
+  WebP/AVIF copies, with the original PNG as the <img> fallback.
+- Charts the server no longer renders with Plotly are drawn in the browser by
+  static/js/classic-charts.js: the home page's ratings and RAPM-vs-APM
+  charts when no plot HTML was built (the fallbacks in legacy/index.html),
+  and the player page's rolling averages under CLASSIC_PLAYER_CHARTS=json.
+- Whole pages are rendered once per build and served from gzipped files (see
+  classic_pages.py), so the views below run once per page, not per request.
+
 Do not refactor this module to share code with the new site. Its whole job is
 to keep working exactly as it did, and drift is the thing we are guarding
 against. It is fed by the same live data, so it stays current.
@@ -17,13 +33,19 @@ against. It is fed by the same live data, so it stays current.
 import polars as pl
 from flask import Blueprint, current_app, render_template
 
-from collective_bball.paths import player_photo_path, player_thumb_path
+from collective_bball.player_images import player_images
+from flask_app.payload_cache import namespace_for
 from flask_app.player_page_data_loader import load_player_bio_data
 from flask_app.utility_imports import tooltips
 from flask_app.web_data_loader import format_stats_for_site
 
 legacy = Blueprint("legacy", __name__, url_prefix="/classic")
 
+# Charts the server didn't draw with Plotly (see PLAYER_CHART_MODES and
+# artifacts.PLOTS) are drawn in the browser by static/js/classic-charts.js,
+# with the Plotly.js build the pinned plotly package's to_html("cdn") links to.
+PLOTLY_JS_CDN = "https://cdn.plot.ly/plotly-3.0.1.min.js"
+
 
 # Columns the original site dropped before rendering. Kept as module constants
 # so the three views stay in sync the way they did when they were inline.
@@ -65,18 +87,13 @@ def _first_poss_label(df: pl.DataFrame) -> pl.DataFrame:
 
 
 def prepare_home_page_data(data_cached) -> dict:
-    """Pre-shape every home page table. This is the ~66 MB render the original
-    site did on every request; we now do it once and cache it."""
-
-    players_with_images = {
-        name
-        for name in data_cached.player_data["player"].to_list()
-        if player_thumb_path(name).exists()
-    }
+    """Shape every home page table. This is the ~66 MB render the original
+    site did on every request; it is now rendered once per build and served
+    from disk (see classic_pages.py)."""
 
     def add_has_img(rows):
         for row in rows:
-            row["has_img"] = row.get("Player", "") in players_with_images
+            row["has_img"] = player_images.has_thumb(row.get("Player", ""))
         return rows
 
     stats = format_stats_for_site(data_cached.player_data.drop(_PLAYER_BIO_DROP_COLS))
@@ -117,69 +134,133 @@ def prepare_home_page_data(data_cached) -> dict:
     }
 
 
-def _home_page_data() -> dict:
-    """Build the home page tables on first visit and cache them until the
-    underlying data is hot-swapped."""
-    store = current_app.config["DATA_STORE"]
-    cached = current_app.config.get("LEGACY_HOME_PAGE_DATA")
-    if cached is not None and cached["version"] == store.version:
-        return cached["data"]
+def _render_home(data_cached) -> str:
+    tables = prepare_home_page_data(data_cached)
 
-    data = prepare_home_page_data(store.data)
-    current_app.config["LEGACY_HOME_PAGE_DATA"] = {
-        "version": store.version,
-        "data": data,
-    }
-    return data
+    return render_template(
+        "legacy/index.html",
+        stats=tables["stats"],
+        num_days=tables["num_days"],
+        games=tables["games"],
+        ratings=tables["ratings"],
+        player_days=tables["player_days"],
+        teammates=tables["teammates"],
+        opponents=tables["opponents"],
+        days_of_week=tables["days_of_week"],
+        days=tables["days"],
+        best_lambda=tables["best_lambda"],
+        main_tooltip=tooltips.main_tooltip,
+        plot_ratings=tables["plot_ratings"],
+        plot_rapm_apm=tables["plot_rapm_apm"],
+        plotly_js_cdn=PLOTLY_JS_CDN,
+    )
+
+
+def prerender_pages(data_cached, version: int, players) -> dict:
+    """The pages rendered ahead of their first visit: home, every date, and
+    `players`' pages. `{page: render(data)}`, for ClassicPages.prerender."""
+    pages = {"home": _render_home}
+    for date in data_cached.days["game_date"].to_list():
+        pages[f"date:{date}"] = lambda data, date=date: _render_date(data, date)
+    for name in players:
+        pages[_player_page(name)] = lambda data, name=name: _render_player(
+            data, version, name
+        )
+    return pages
 
 
 @legacy.route("/")
 def home():
-    cached = _home_page_data()
-
-    return render_template(
-        "legacy/index.html",
-        stats=cached["stats"],
-        num_days=cached["num_days"],
-        games=cached["games"],
-        ratings=cached["ratings"],
-        player_days=cached["player_days"],
-        teammates=cached["teammates"],
-        opponents=cached["opponents"],
-        days_of_week=cached["days_of_week"],
-        days=cached["days"],
-        best_lambda=cached["best_lambda"],
-        main_tooltip=tooltips.main_tooltip,
-        plot_ratings=cached["plot_ratings"],
-        plot_rapm_apm=cached["plot_rapm_apm"],
+    data_cached = current_app.config["DATA_STORE"].data
+    return current_app.config["CLASSIC_PAGES"].serve(
+        data_cached, "home", lambda: _render_home(data_cached)
     )
 
 
 @legacy.route("/player/<player_name>")
 def player_page(player_name):
-    # Imported here rather than at module scope so a normal boot never pays
-    # plotly's import cost; only a visit to a classic player page does.
-    from collective_bball.plots import Plots
+    data_cached, version = current_app.config["DATA_STORE"].snapshot()
+    if data_cached.rows_for("player_data", "player", player_name).is_empty():
+        # Rendered as before, but not kept: any name can be asked for.
+        return _render_player(data_cached, version, player_name, known=False)
+    return current_app.config["CLASSIC_PAGES"].serve(
+        data_cached,
+        _player_page(player_name),
+        lambda: _render_player(data_cached, version, player_name),
+    )
 
-    data_cached = current_app.config["DATA_STORE"].data
 
-    image_exists = player_photo_path(player_name).exists()
+# The original page drew its rolling-averages chart with Plotly on the server.
+# CLASSIC_PLAYER_CHARTS=json leaves that to the browser instead, from the
+# same /api rolling payload the new site's chart uses.
+PLAYER_CHART_MODES = ("plotly", "json")
+
+
+def _player_page(player_name: str) -> str:
+    """The page name a player's classic page is filed under. The two chart
+    modes render different HTML, so they are filed apart."""
+    mode = current_app.config["CLASSIC_PLAYER_CHARTS"]
+    return f"player:{player_name}|charts={mode}"
+
+
+def _rolling_chart_html(
+    data_cached, version: int, player_name: str, persist: bool = True
+) -> str:
+    """The Plotly rolling-averages chart, rendered once per player and version.
+
+    It is most of a classic player page's render time, and unlike the page
+    around it, it only depends on the data, so it is kept in the payload
+    cache and on its disk tier: a deploy that changes the templates renders
+    the pages again without redoing the charts. Without `persist` it is kept
+    in memory only, as for a name that isn't a player, which could be any.
+    """
+
+    def build() -> bytes:
+        # Imported here rather than at module scope so a normal boot never
+        # pays plotly's import cost; only rendering a classic chart does.
+        from collective_bball.plots import Plots
+
+        return (
+            Plots(conn=None)
+            .plot_player_rolling_avg(
+                player_name=player_name,
+                player_games=data_cached.rows_for(
+                    "player_games", "player", player_name
+                ),
+            )
+            .to_html(full_html=False, include_plotlyjs="cdn")
+            .encode("utf-8")
+        )
+
+    return (
+        current_app.config["API_CACHE"]
+        .get_or_build(
+            f"classic-rolling:{player_name}",
+            version,
+            build,
+            namespace=namespace_for(data_cached) if persist else "",
+        )
+        .decode("utf-8")
+    )
+
+
+def _render_player(
+    data_cached, version: int, player_name: str, known: bool = True
+) -> str:
+    image_exists = player_images.has_photo(player_name)
 
     full_name, height_str, position, birthday = load_player_bio_data(
         player_name=player_name, player_data=data_cached.player_data
     )
 
-    with current_app.config["DATA_STORE"].db() as conn:
-        plots = Plots(conn)
-        player_rating_over_time = plots.plot_player_ratings_time(
-            player_name=player_name
-        ).to_html(full_html=False, include_plotlyjs="cdn")
-        player_games_rolling = plots.plot_player_rolling_avg(
-            player_name=player_name,
-            player_games=data_cached.player_games.filter(
-                pl.col("player") == player_name
-            ),
-        ).to_html(full_html=False, include_plotlyjs="cdn")
+    # The page used to render a ratings-over-time chart too, but never showed
+    # it; only the rolling averages appear on it.
+    if current_app.config["CLASSIC_PLAYER_CHARTS"] == "json":
+        player_games_rolling = None
+    else:
+        player_games_rolling = _rolling_chart_html(
+            data_cached, version, player_name, persist=known
+        )
 
     return render_template(
         "legacy/player.html",
@@ -189,10 +270,10 @@ def player_page(player_name):
         position=position,
         birthday=birthday,
         image_exists=image_exists,
-        player_rating_over_time_html=player_rating_over_time,
         player_games_rolling_html=player_games_rolling,
+        plotly_js_cdn=PLOTLY_JS_CDN,
         player_stats=format_stats_for_site(
-            data_cached.player_data.filter(pl.col("player") == player_name).drop(
+            data_cached.rows_for("player_data", "player", player_name).drop(
                 ["player"] + _PLAYER_BIO_DROP_COLS
             )
         ),
@@ -200,22 +281,22 @@ def player_page(player_name):
         .with_columns(pl.col("rating").round(5))
         .to_dicts(),
         player_days=format_stats_for_site(
-            data_cached.player_days.filter(pl.col("player") == player_name).drop(
+            data_cached.rows_for("player_days", "player", player_name).drop(
                 ["player", "rating", "resident"]
             )
         ),
         player_games=format_stats_for_site(
-            data_cached.player_games.filter(pl.col("player") == player_name)
+            data_cached.rows_for("player_games", "player", player_name)
             .drop(["rating", "player", "resident"])
             .with_columns(pl.col("win_prob").round(3))
         ),
         player_teammates=format_stats_for_site(
-            data_cached.teammates.filter(pl.col("player") == player_name).drop(
+            data_cached.rows_for("teammates", "player", player_name).drop(
                 ["player", "pairing"]
             )
         ),
         player_oppponents=format_stats_for_site(
-            data_cached.opponents.filter(pl.col("player") == player_name).drop(
+            data_cached.rows_for("opponents", "player", player_name).drop(
                 ["player"]
             )
         ),
@@ -226,27 +307,34 @@ def player_page(player_name):
 @legacy.route("/date/<date>")
 def date_page(date):
     data_cached = current_app.config["DATA_STORE"].data
+    if data_cached.rows_for("days", "game_date", date).is_empty():
+        return _render_date(data_cached, date)
+    return current_app.config["CLASSIC_PAGES"].serve(
+        data_cached, f"date:{date}", lambda: _render_date(data_cached, date)
+    )
+
 
+def _render_date(data_cached, date: str) -> str:
     return render_template(
         "legacy/date.html",
         date=date,
-        day_of_week=data_cached.games.filter(pl.col("game_date") == date)
+        day_of_week=data_cached.rows_for("games", "game_date", date)
         .select("day")
         .item(0, 0),
         day_data=format_stats_for_site(
-            data_cached.days.filter(pl.col("game_date") == date).drop(
+            data_cached.rows_for("days", "game_date", date).drop(
                 ["game_date", "day"]
             )
         ),
         player_day=format_stats_for_site(
-            data_cached.player_days.filter(pl.col("game_date") == date).drop(
+            data_cached.rows_for("player_days", "game_date", date).drop(
                 ["game_date", "day", "rating", "resident"]
             ),
             does_player_image_exist_row=True,
         ),
         day_games=format_stats_for_site(
             _first_poss_label(
-                data_cached.games.filter(pl.col("game_date") == date)
+                data_cached.rows_for("games", "game_date", date)
             ).drop(_GAME_DROP_COLS)
         ),
         main_tooltip=tooltips.main_tooltip,
@@ -0,0 +1,60 @@
+"""
+Rendered HTML for the site's pages, once per data version.
+
+The API's payloads were cached long ago, but the pages around them weren't:
+every view of the home page re-ran a 90-day group_by for the wins leader and
+parsed every birthday, and every player, date and team-builder view rebuilt
+its rating ranks, awards and profile groups before rendering. None of that
+changes until the data does.
+
+Pages now go through the same PayloadCache as the API, under a `page:` name.
+They share its byte budget and its single flight, so a burst of views right
+after a swap renders each page once, and a swap retires every page with
+everything else. A cached view does no Polars work at all.
+
+A page's name is its route and arguments, plus whatever else its HTML
+depends on:
+  - the theme cookie, which base.html writes onto <html>;
+  - the picture manifest's revision, since pages embed image URLs;
+  - for birthday listings, the local date.
+Pages live in memory only. Their HTML comes from templates and scripts that a
+deploy changes, while the disk tier only knows artifact builds.
+"""
+
+from datetime import date
+from typing import Callable, Optional
+
+from flask import Response, current_app, request
+
+from collective_bball.player_images import player_images
+
+THEMES = ("", "light", "dark")
+
+
+class PageNotFoundError(LookupError):
+    """Raised by a page's renderer when what it shows doesn't exist."""
+
+
+def cached_page(
+    name: str, render: Callable[[object], str], day: Optional[date] = None
+) -> Response:
+    """The page `name`, rendered by `render(data)` if it isn't cached yet.
+
+    `day` is for pages that count days from today. A PageNotFoundError from
+    `render` propagates, and nothing is cached: the route answers 404.
+    """
+    data, version = current_app.config["DATA_STORE"].snapshot()
+
+    theme = request.cookies.get("nn-theme", "")
+    if theme not in THEMES:
+        # Any other value is rendered as sent; caching it would let anyone
+        # fill the cache with copies of one page.
+        return Response(render(data), mimetype="text/html")
+
+    key = f"page:{name}|theme={theme}|images={player_images.revision}"
+    if day is not None:
+        key += f"|day={day.isoformat()}"
+    body = current_app.config["API_CACHE"].get_or_build(
+        key, version, lambda: render(data).encode("utf-8")
+    )
+    return Response(body, mimetype="text/html")
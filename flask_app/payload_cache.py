@@ -0,0 +1,275 @@
+"""
+Serialized payloads, built at most once per key and data version.
+
+The first burst of page loads after a swap all miss at once. Without
+coordination each worker thread rebuilt and serialized the same table, so a
+refresh showed up as a CPU spike several builds wide. Here the first thread to
+miss a key becomes its builder; every other thread asking for that key waits
+for the result instead of repeating the work.
+
+Entries are keyed on (name, DataStore.version). Requests always ask for the
+version being served, and the first request at a newer version drops every
+older entry, so a swap invalidates everything without an explicit flush. The
+warmer fills in the next version ahead of the swap through `prebuild()`, which
+leaves the served version's entries alone; see warmer.py.
+
+Memory is bounded by a byte budget, least recently used out first.
+
+Behind memory sits a disk tier under paths.data_dir(), so payloads outlive the
+process. The Fly machine suspends when idle and restarts on every deploy, and
+each time the cache used to start empty. On disk, payloads are filed under the
+artifact build they were made from rather than under the process-local version
+counter, so a fresh process serving the same artifacts finds them again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from collective_bball.artifacts import SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, int]
+
+# Comfortably above the eight league tables plus the charts (~3 MB together)
+# and a few hundred player bundles, and small beside the 512 MB machine.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Bump when the shape or content of any cached payload changes. The artifacts
+# don't change on a deploy, so without this a new release would restore
+# payloads the old code wrote.
+CACHE_FORMAT = 2
+
+# Builds kept on disk: the one being served and the one before it, which is
+# still answering requests while its successor warms up.
+DISK_NAMESPACES_KEPT = 2
+
+
+def namespace_for(data) -> str:
+    """Names one artifact build on disk. Empty when the build can't be identified.
+
+    Keyed by the workbook fingerprint and the artifact schema, plus the build
+    time: a forced rebuild of an unchanged workbook still rewrites the ratings
+    history, so it must not reuse the previous build's charts.
+    """
+    fingerprint = getattr(data, "source_fingerprint", "")
+    if not fingerprint:
+        return ""
+    stamp = hashlib.sha1(
+        f"{CACHE_FORMAT}:{getattr(data, 'built_at', '')}".encode("utf-8")
+    ).hexdigest()[:8]
+    return f"{fingerprint[:16]}-s{SCHEMA_VERSION}-{stamp}"
+
+
+class DiskTier:
+    """Payloads persisted one file each, in one directory per artifact build.
+
+    Each directory carries an index of what it holds. Indexes are read the
+    first time their build is asked for, not at boot, so a large cache costs
+    nothing until it is used. A put appends one line to its index rather than
+    rewriting it, so filing a payload costs the same however many are filed.
+    """
+
+    INDEX_FILENAME = "index.jsonl"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._indexes: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, namespace: str) -> Dict[str, str]:
+        index = self._indexes.get(namespace)
+        if index is None:
+            path = self.root / namespace / self.INDEX_FILENAME
+            index = {}
+            try:
+                lines = path.read_text(encoding="utf-8").splitlines()
+            except OSError:
+                lines = []
+            for line in lines:
+                try:
+                    name, filename = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash mid-append; its file may
+                    # not be complete either, so it is simply forgotten.
+                    continue
+                index[name] = filename
+            self._indexes[namespace] = index
+        return index
+
+    def get(self, namespace: str, name: str) -> Optional[bytes]:
+        with self._lock:
+            filename = self._index(namespace).get(name)
+        if filename is None:
+            return None
+        try:
+            return (self.root / namespace / filename).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, namespace: str, name: str, value: bytes) -> None:
+        directory = self.root / namespace
+        filename = hashlib.sha1(name.encode("utf-8")).hexdigest()[:20] + ".bin"
+        with self._lock:
+            if not directory.exists():
+                directory.mkdir(parents=True)
+                self._prune(keep=namespace)
+            _write_atomic(directory / filename, value)
+            index = self._index(namespace)
+            if index.get(name) != filename:
+                index[name] = filename
+                with open(directory / self.INDEX_FILENAME, "a", encoding="utf-8") as f:
+                    f.write(json.dumps([name, filename]) + "\n")
+
+    def _prune(self, keep: str) -> None:
+        """Delete all but the newest builds. Called when a new one appears."""
+        others = sorted(
+            (p for p in self.root.iterdir() if p.is_dir() and p.name != keep),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in others[DISK_NAMESPACES_KEPT - 1:]:
+            shutil.rmtree(stale, ignore_errors=True)
+            self._indexes.pop(stale.name, None)
+
+
+def _write_atomic(path: Path, value: bytes) -> None:
+    staging = path.with_suffix(path.suffix + ".tmp")
+    staging.write_bytes(value)
+    os.replace(staging, path)
+
+
+class _Flight:
+    """A build in progress. Late arrivals wait on it rather than repeating it."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PayloadCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk: Optional[DiskTier] = None):
+        self.max_bytes = max_bytes
+        self._disk = disk
+        self._entries: "OrderedDict[Key, bytes]" = OrderedDict()
+        self._flights: Dict[Key, _Flight] = {}
+        self._bytes = 0
+        self._served = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(
+        self, name: str, version: int, build: Callable[[], bytes], namespace: str = ""
+    ) -> bytes:
+        """Return the cached payload, building it if no one else already is.
+
+        For the version being served. A build that raises propagates to its
+        caller and to everyone waiting on it, and nothing is cached, so the
+        next request tries again. `namespace` (see namespace_for) files the
+        payload on disk; without one it lives in memory only.
+        """
+        with self._lock:
+            if version > self._served:
+                # Drop entries from superseded versions only. Clearing
+                # everything would evict the eight league-wide tables each
+                # time a player page is opened.
+                for stale in [k for k in self._entries if k[1] < version]:
+                    self._bytes -= len(self._entries.pop(stale))
+                self._served = version
+        return self._get_or_build((name, version), build, namespace)
+
+    def prebuild(
+        self, name: str, version: int, build: Callable[[], bytes], namespace: str = ""
+    ) -> bytes:
+        """Build an entry for a version that is not being served yet.
+
+        Unlike get_or_build this never evicts the served version, which keeps
+        answering requests until the new one is swapped in.
+        """
+        return self._get_or_build((name, version), build, namespace)
+
+    def _get_or_build(self, key: Key, build: Callable[[], bytes], namespace: str) -> bytes:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._restore(namespace, key[0])
+            if flight.value is None:
+                flight.value = build()
+                self._persist(namespace, key[0], flight.value)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._store(key, flight.value)
+            flight.done.set()
+
+        return flight.value
+
+    def _restore(self, namespace: str, name: str) -> Optional[bytes]:
+        if self._disk is None or not namespace:
+            return None
+        return self._disk.get(namespace, name)
+
+    def _persist(self, namespace: str, name: str, value: bytes) -> None:
+        # Best effort. A full or read-only volume costs the next boot a
+        # rebuild, which is no reason to fail the request that built it.
+        if self._disk is None or not namespace:
+            return
+        try:
+            self._disk.put(namespace, name, value)
+        except OSError as exc:
+            logger.warning("Could not persist %s payload: %s", name, exc)
+
+    def _store(self, key: Key, value: bytes) -> None:
+        name, version = key
+        # A request that started before a swap can finish after it. Its
+        # payload describes data nobody will ask for again, so don't keep it.
+        if version < self._served:
+            return
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += len(value)
+        while self._bytes > self.max_bytes:
+            _evicted, old = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+        logger.debug("Cached %s payload (%d KB)", name, len(value) // 1024)
+
+    @property
+    def disk(self) -> Optional[DiskTier]:
+        return self._disk
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -116,7 +116,7 @@ class RefreshService:
                         "rebuild_count": self.status["rebuild_count"] + 1,
                     }
                 )
-                logger.info("Dataset swapped in at version %d", version)
+                logger.info("Dataset rebuilt; version %d is served once warmed", version)
                 return {
                     "changed": True,
                     "version": version,
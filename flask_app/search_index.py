@@ -0,0 +1,148 @@
+"""
+The header search, answered on the server.
+
+`/api/search` used to send every player and every game date to the browser,
+which then scanned them on each keystroke. That blob grows with the league, and
+building it checked the disk for every player's thumbnail. Now the page sends
+what has been typed and gets back the few best matches.
+
+Matching keeps the order the browser used: the name exactly, then names
+starting with the query, then full names (or any word of one) starting with it,
+then names and full names containing it. After those come near misses, for
+"Kenenth" or "Jakc": names within one typo of the query, two for longer
+queries, counting a swapped pair of letters as one. Within each tier, players
+with more games come first.
+
+Built once per data version (see api.py). Lookups never scan every entry.
+Prefixes are found by binary search over the sorted keys, which gives a
+trie's lookups without its memory. Substrings and near misses start from an
+index of each key's letter pairs: only keys sharing enough pairs with the
+query are compared with it.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Ranks, best first. The first five match the browser's old scoring.
+EXACT, PREFIX, FULL_PREFIX, SUBSTRING, FULL_SUBSTRING, TYPO = range(6)
+
+DEFAULT_RESULTS = 8
+MAX_RESULTS = 50
+
+
+def _allowed_typos(query: str) -> int:
+    # Short queries are mostly prefixes; one edit would match half the league.
+    if len(query) < 4 or not any(ch.isalpha() for ch in query):
+        return 0
+    return 1 if len(query) < 8 else 2
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _prefix_distance(query: str, text: str, limit: int) -> Optional[int]:
+    """Fewest edits turning `query` into some prefix of `text`, if at most
+    `limit`. A swap of neighbouring letters counts as one edit."""
+    previous2: List[int] = []
+    previous = list(range(len(text) + 1))
+    # Damerau-Levenshtein, rows over the query and columns over the text. Any
+    # prefix of the text will do, so the answer is the last row's minimum, and
+    # once a whole row is past `limit` no later one can come back under it.
+    for i in range(1, len(query) + 1):
+        current = [i] + [0] * len(text)
+        for j in range(1, len(text) + 1):
+            cost = 0 if query[i - 1] == text[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                i > 1 and j > 1
+                and query[i - 1] == text[j - 2]
+                and query[i - 2] == text[j - 1]
+            ):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return None
+        previous2, previous = previous, current
+    best = min(previous)
+    return best if best <= limit else None
+
+
+class SearchIndex:
+    """Players and game dates, searchable by name, full name, date or day."""
+
+    def __init__(self, players: List[dict], dates: List[dict]):
+        # Entries are what the route returns, in the shape the header renders.
+        self.entries = players + dates
+        self._keys: List[Tuple[str, int, bool]] = []  # (text, entry, is name)
+        for index, entry in enumerate(self.entries):
+            self._keys.append((entry["n"].lower(), index, True))
+            full = (entry.get("f") or "").lower()
+            if full:
+                self._keys.append((full, index, False))
+                # Any word of a full name, so a surname finds its player.
+                words = full.split()
+                self._keys += [(word, index, False) for word in words[1:]]
+
+        self._sorted = sorted(range(len(self._keys)), key=lambda k: self._keys[k][0])
+        self._sorted_text = [self._keys[k][0] for k in self._sorted]
+
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+        for key, (text, _entry, _is_name) in enumerate(self._keys):
+            for gram in _bigrams(text):
+                self._grams[gram].add(key)
+
+    def search(self, query: str, limit: int = DEFAULT_RESULTS) -> List[dict]:
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+
+        best: Dict[int, Tuple[int, int]] = {}  # entry -> (rank, typos)
+
+        def offer(entry: int, rank: int, typos: int = 0) -> None:
+            if (rank, typos) < best.get(entry, (TYPO + 1, 0)):
+                best[entry] = (rank, typos)
+
+        for key in self._with_prefix(query):
+            text, entry, is_name = self._keys[key]
+            if is_name:
+                offer(entry, EXACT if text == query else PREFIX)
+            else:
+                offer(entry, FULL_PREFIX)
+
+        grams = _bigrams(query)
+        if grams:
+            for key in set.intersection(*(self._grams.get(g, set()) for g in grams)):
+                text, entry, is_name = self._keys[key]
+                if query in text:
+                    offer(entry, SUBSTRING if is_name else FULL_SUBSTRING)
+
+        typos = _allowed_typos(query)
+        if typos:
+            # Each edit breaks at most three of the query's letter pairs, so
+            # a key sharing fewer can't be within reach.
+            shared: Dict[int, int] = defaultdict(int)
+            for gram in grams:
+                for key in self._grams.get(gram, ()):
+                    shared[key] += 1
+            needed = max(1, len(grams) - 3 * typos)
+            for key, count in shared.items():
+                if count < needed:
+                    continue
+                text, entry, _is_name = self._keys[key]
+                distance = _prefix_distance(query, text, typos)
+                if distance is not None:
+                    offer(entry, TYPO, distance)
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (item[1], -(self.entries[item[0]].get("g") or 0), item[0]),
+        )
+        return [self.entries[entry] for entry, _rank in ranked[:limit]]
+
+    def _with_prefix(self, query: str) -> List[int]:
+        start = bisect_left(self._sorted_text, query)
+        end = start
+        while end < len(self._sorted_text) and self._sorted_text[end].startswith(query):
+            end += 1
+        return self._sorted[start:end]
@@ -0,0 +1,123 @@
+/* ---------------------------------------------------------
+   CLASSIC CHARTS — Plotly charts drawn in the browser from /api
+   data, for the charts the server no longer renders as HTML
+   (see legacy_views.py). Each one mirrors the original figure.
+--------------------------------------------------------- */
+
+const CLASSIC_CHARTS = {
+    // Player page: 20-game rolling averages.
+    "rolling": (el, data) => {
+        const player = el.dataset.player;
+
+        // Window start dates, for the "Dates" hover label the
+        // server-rendered chart had.
+        const ranges = data.dates.map((date, i) =>
+            i >= data.window - 1 ? `${data.dates[i - data.window + 1]} to ${date}` : null
+        );
+
+        const traces = data.series.map(series => ({
+            type: "scatter",
+            mode: "lines",
+            name: series.name,
+            x: data.x,
+            y: series.v,
+            customdata: ranges,
+            hovertemplate:
+                "Player Game Number=%{x}<br>Rolling Average=%{y}<br>Dates=%{customdata}" +
+                `<extra>${series.name}</extra>`,
+        }));
+
+        return [traces, {
+            title: {
+                text: `${player}: ${data.window}-Game Rolling Averages<br><sup>Double click on a metric to isolate it click to add others. Draw area to zoom.</sup>`,
+            },
+            xaxis: { title: { text: "Player Game Number" } },
+            yaxis: { title: { text: "Rolling Values" } },
+            legend: { title: { text: "Metric" } },
+        }];
+    },
+
+    // Home page: every player's rating over time.
+    "ratings-history": (el, data) => {
+        const traces = data.series.map(series => ({
+            type: "scatter",
+            mode: "lines",
+            name: series.name,
+            x: data.dates,
+            y: series.v,
+            hovertemplate: `player=${series.name}<br>date=%{x}<br>rating=%{y}<extra></extra>`,
+        }));
+
+        return [traces, {
+            title: {
+                text: "Player Ratings Over Time <br><sup>Double click on a player to filter to them and click to add others. Draw area to zoom.</sup>",
+            },
+            xaxis: { title: { text: "date" }, type: "date" },
+            yaxis: { title: { text: "rating" } },
+            legend: { title: { text: "player" } },
+        }];
+    },
+
+    // Home page: RAPM rating against APM, sized by games played.
+    "rapm-apm": (el, data) => {
+        const points = data.points;
+        const maxGames = Math.max(...points.map(p => p.g));
+
+        const scatter = {
+            type: "scatter",
+            mode: "markers",
+            showlegend: false,
+            x: points.map(p => p.x),
+            y: points.map(p => p.y),
+            text: points.map(p => p.n),
+            marker: {
+                size: points.map(p => p.g),
+                sizemode: "area",
+                // Plotly Express's scaling: the largest bubble is 20px across.
+                sizeref: (2 * maxGames) / (20 ** 2),
+                color: points.map(p => p.w),
+                colorscale: "Plasma",
+                colorbar: { title: { text: "Win Pct" } },
+            },
+            hovertemplate:
+                "APM=%{x}<br>Rating=%{y}<br>Games Played=%{marker.size}" +
+                "<br>Win Pct=%{marker.color}<br>player=%{text}<extra></extra>",
+        };
+        const identity = {
+            type: "scatter",
+            mode: "lines",
+            name: "y = x",
+            x: [-5, 5],
+            y: [-5, 5],
+            line: { dash: "dash", color: "black" },
+        };
+
+        return [[scatter, identity], {
+            title: {
+                text: "RAPM Player Rating vs APM Player Rating<br><sub>Bubble size reflects number of games played</sub>",
+            },
+            xaxis: {
+                range: [-5, 5],
+                title: { text: "APM = Avg Score Diff Minus (Average Rating of Teammates - Opposition)" },
+            },
+            yaxis: {
+                range: [-5, 5],
+                title: { text: "Regularized Version of APM (Rating)" },
+            },
+        }];
+    },
+};
+
+document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll(".classic-chart").forEach(el => {
+        const draw = CLASSIC_CHARTS[el.dataset.kind];
+        if (!draw) return;
+
+        fetch(el.dataset.url)
+            .then(res => res.json())
+            .then(data => {
+                const [traces, layout] = draw(el, data);
+                Plotly.newPlot(el, traces, layout, { responsive: true });
+            });
+    });
+});
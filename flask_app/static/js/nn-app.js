@@ -1,5 +1,5 @@
 /* ==========================================================================
-   Application shell: theme, avatars, tabs, search.
+   Application shell: theme, avatars, tabs, search, live updates.
    ========================================================================== */
 
 (function (window, document) {
@@ -7,6 +7,14 @@
 
   var NN = (window.NN = window.NN || {});
 
+  /* API requests go under a prefix naming the build the page was rendered
+     from (see versioned() in api.py), so the browser can keep every answer
+     instead of revalidating it. Moved along when a newer build is pushed. */
+  NN.apiBase = (function () {
+    var meta = document.querySelector('meta[name="nn-api"]');
+    return (meta && meta.content) || "/api";
+  })();
+
   /* -- theme ------------------------------------------------------------- */
 
   var THEME_KEY = "nn-theme";
@@ -29,19 +37,23 @@
   /* -- avatars ----------------------------------------------------------- */
 
   /* Which players have a thumbnail is baked into the page as JSON, so tables
-     never request an image that would 404 and never wait on a round trip. */
+     never request an image that would 404 and never wait on a round trip.
+     Each comes with its content hash, which goes in the URL: the server lets
+     browsers keep a hashed picture for good (see app.py). */
   var thumbs = null;
 
-  NN.hasThumb = function (name) {
+  NN.thumbUrl = function (name) {
     if (thumbs === null) {
       var node = document.getElementById("nn-thumbs");
       try {
-        thumbs = new Set(node ? JSON.parse(node.textContent) : []);
+        thumbs = (node && JSON.parse(node.textContent)) || {};
       } catch (e) {
-        thumbs = new Set();
+        thumbs = {};
       }
     }
-    return thumbs.has(name);
+    if (!Object.prototype.hasOwnProperty.call(thumbs, name)) return null;
+    return "/static/player_pics_thumbs/" + encodeURIComponent(name) +
+      ".webp?v=" + thumbs[name];
   };
 
   /* -- tabs -------------------------------------------------------------- */
@@ -105,6 +117,7 @@
   /* -- table wiring ------------------------------------------------------ */
 
   var tablesByPanel = new WeakMap();
+  var standaloneTables = [];
 
   NN.activatePanel = function (panel) {
     // Charts render on first reveal; measuring width in a hidden panel gives 0.
@@ -126,7 +139,7 @@
       Array.prototype.forEach.call(hosts, function (host) {
         var table = new NN.DataTable(host, {
           name: host.dataset.table,
-          url: host.dataset.url || "/api/table/" + host.dataset.table,
+          url: host.dataset.url || NN.apiBase + "/table/" + host.dataset.table,
           defaultSort: host.dataset.sort || null
         });
         built.push(table);
@@ -147,7 +160,7 @@
   }
 
   function allTables() {
-    var result = [];
+    var result = standaloneTables.slice();
     document.querySelectorAll("[role=tabpanel]").forEach(function (panel) {
       var built = tablesByPanel.get(panel);
       if (built) result = result.concat(built);
@@ -311,31 +324,13 @@
     var results = document.getElementById("searchResults");
     if (!input || !results) return;
 
-    var entries = null;
     var cursor = -1;
     var shown = [];
-
-    function ensureIndex() {
-      if (entries) return Promise.resolve(entries);
-      return fetch("/api/search")
-        .then(function (r) { return r.json(); })
-        .then(function (payload) {
-          entries = payload.entries;
-          return entries;
-        })
-        .catch(function () { entries = []; return entries; });
-    }
-
-    function score(entry, needle) {
-      var name = entry.n.toLowerCase();
-      var full = (entry.f || "").toLowerCase();
-      if (name === needle) return 0;
-      if (name.indexOf(needle) === 0) return 1;
-      if (full.indexOf(needle) === 0) return 2;
-      if (name.indexOf(needle) !== -1) return 3;
-      if (full.indexOf(needle) !== -1) return 4;
-      return -1;
-    }
+    // Matching happens on the server (/api/search?q=); a reply is only shown
+    // if nothing has been typed since its request went out.
+    var asked = 0;
+    var pending = Promise.resolve();
+    var timer = null;
 
     function render(list) {
       shown = list;
@@ -349,9 +344,9 @@
 
       results.innerHTML = list.map(function (entry, i) {
         if (entry.t === "p") {
-          var avatar = entry.i
-            ? '<img src="/static/player_pics_thumbs/' +
-              encodeURIComponent(entry.n) + '.webp" alt="">'
+          var thumb = entry.i && NN.thumbUrl(entry.n);
+          var avatar = thumb
+            ? '<img src="' + thumb + '" alt="">'
             : '<span class="avatar-fallback">' +
               entry.n.slice(0, 2).toUpperCase() + "</span>";
           return (
@@ -378,25 +373,26 @@
           : "/date/" + encodeURIComponent(entry.n);
     }
 
-    function update() {
-      var needle = input.value.trim().toLowerCase();
-      if (!needle) { render([]); return; }
-
-      ensureIndex().then(function (all) {
-        var scored = [];
-        for (var i = 0; i < all.length; i++) {
-          var s = score(all[i], needle);
-          if (s >= 0) scored.push([s, all[i]]);
-        }
-        scored.sort(function (a, b) {
-          if (a[0] !== b[0]) return a[0] - b[0];
-          return (b[1].g || 0) - (a[1].g || 0);
+    function lookup() {
+      var needle = input.value.trim();
+      var seq = ++asked;
+      timer = null;
+      if (!needle) { render([]); pending = Promise.resolve(); return; }
+
+      pending = fetch(NN.apiBase + "/search?k=8&q=" + encodeURIComponent(needle))
+        .then(function (r) { return r.ok ? r.json() : { entries: [] }; })
+        .catch(function () { return { entries: [] }; })
+        .then(function (payload) {
+          if (seq === asked) render(payload.entries);
         });
-        render(scored.slice(0, 8).map(function (pair) { return pair[1]; }));
-      });
     }
 
-    input.addEventListener("focus", ensureIndex);
+    function update() {
+      // A short pause, so a name typed quickly is one request, not six.
+      clearTimeout(timer);
+      timer = setTimeout(lookup, 120);
+    }
+
     input.addEventListener("input", update);
 
     input.addEventListener("keydown", function (event) {
@@ -411,9 +407,13 @@
         });
       } else if (event.key === "Enter") {
         event.preventDefault();
-        go(shown[cursor >= 0 ? cursor : 0]);
+        if (cursor >= 0) { go(shown[cursor]); return; }
+        // Typed and entered before the matches arrived: go to the best one.
+        if (timer) { clearTimeout(timer); timer = null; lookup(); }
+        pending.then(function () { go(shown[0]); });
       } else if (event.key === "Escape") {
         input.value = "";
+        asked++;
         render([]);
         input.blur();
       }
@@ -438,6 +438,75 @@
     });
   }
 
+  /* -- live updates ------------------------------------------------------ */
+
+  /* The server pushes an event whenever it swaps in new data (see
+     flask_app/events.py). Tables that have loaded refetch then, rather than
+     the page having to be reloaded. The stream is closed while the tab is
+     hidden, so a background tab neither holds a server thread nor keeps the
+     machine from suspending; on return the first event says whether anything
+     changed meanwhile. */
+  var RECONNECT_MS = 60 * 1000;  // after the server turned the stream away
+
+  /* Point every API URL on the page at the new build's prefix. Old URLs would
+     still work, redirected, but at a round trip each. */
+  function moveApiBase(base) {
+    var old = NN.apiBase + "/";
+    function moved(url) {
+      return url && url.indexOf(old) === 0 ? base + "/" + url.slice(old.length) : url;
+    }
+    document.querySelectorAll("[data-url]").forEach(function (host) {
+      host.dataset.url = moved(host.dataset.url);
+    });
+    allTables().forEach(function (table) { table.url = moved(table.url); });
+    NN.apiBase = base;
+  }
+
+  function initLiveUpdates() {
+    var meta = document.querySelector('meta[name="nn-build"]');
+    if (!window.EventSource || !meta || !meta.content) return;
+    if (!document.querySelector("[data-table]")) return;
+
+    var build = meta.content;
+    var source = null;
+    var retry = null;
+
+    function open() {
+      if (source || document.hidden) return;
+      source = new EventSource("/api/events");
+      source.addEventListener("swap", function (event) {
+        var data;
+        try { data = JSON.parse(event.data); } catch (e) { return; }
+        if (data.build && data.build !== build) {
+          build = data.build;
+          if (data.api) moveApiBase(data.api);
+          allTables().forEach(function (table) { table.refresh(); });
+        }
+      });
+      source.addEventListener("error", function () {
+        // The browser reconnects by itself unless the server refused the
+        // stream outright; then try again later.
+        if (source && source.readyState === EventSource.CLOSED) {
+          source = null;
+          clearTimeout(retry);
+          retry = setTimeout(open, RECONNECT_MS);
+        }
+      });
+    }
+
+    function close() {
+      clearTimeout(retry);
+      if (source) source.close();
+      source = null;
+    }
+
+    document.addEventListener("visibilitychange", function () {
+      if (document.hidden) close();
+      else open();
+    });
+    open();
+  }
+
   /* -- boot -------------------------------------------------------------- */
 
   document.addEventListener("DOMContentLoaded", function () {
@@ -453,9 +522,10 @@
       if (host.closest("[role=tabpanel]")) return;
       var table = new NN.DataTable(host, {
         name: host.dataset.table,
-        url: host.dataset.url || "/api/table/" + host.dataset.table,
+        url: host.dataset.url || NN.apiBase + "/table/" + host.dataset.table,
         defaultSort: host.dataset.sort || null
       });
+      standaloneTables.push(table);
       table.load();
     });
 
@@ -469,5 +539,6 @@
     initNav();
     initSearch();
     initTooltips();
+    initLiveUpdates();
   });
 })(window, document);
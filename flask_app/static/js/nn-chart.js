@@ -762,9 +762,10 @@
         class: "scatter-dot", href: "/player/" + encodeURIComponent(p.n)
       }, dataLayer);
 
-      if (p.i) {
+      var thumb = p.i && window.NN.thumbUrl(p.n);
+      if (thumb) {
         el("image", {
-          href: "/static/player_pics_thumbs/" + encodeURIComponent(p.n) + ".webp",
+          href: thumb,
           x: cx - r, y: cy - r, width: r * 2, height: r * 2,
           preserveAspectRatio: "xMidYMid slice",
           "clip-path": "url(#nn-dot-clip)"
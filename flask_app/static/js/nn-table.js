@@ -7,6 +7,12 @@
    everything scrolled past and everything still below, so the scrollbar
    reflects the whole dataset while the row count stays constant. Without this
    the Opponents table alone would put 10,441 rows on the page.
+
+   The first request asks for one page. If that is the whole table, everything
+   happens in the browser as before. If not, the table stays remote: sorting
+   and filtering are sent to the server, and pages are fetched as they scroll
+   into view, so the big tabs paint after one small response instead of after
+   downloading all of their history.
    ========================================================================== */
 
 (function (window, document) {
@@ -14,6 +20,9 @@
 
   var OVERSCAN = 8;          // rows rendered beyond the viewport, each way
   var FALLBACK_ROW_H = 33;   // used until a real row can be measured
+  var PAGE = 200;            // rows per request when the table is remote; api.py
+                             // warms this first page (FIRST_PAGE_ROWS)
+  var EXPORT_PAGE = 1000;    // the most the server returns at once
 
   function esc(value) {
     return String(value).replace(/[&<>"']/g, function (ch) {
@@ -42,9 +51,9 @@
     switch (col.type) {
       case "player": {
         var name = esc(value);
-        var avatar = window.NN.hasThumb(value)
-          ? '<img loading="lazy" src="/static/player_pics_thumbs/' +
-            encodeURIComponent(value) + '.webp" alt="">'
+        var thumb = window.NN.thumbUrl(value);
+        var avatar = thumb
+          ? '<img loading="lazy" src="' + thumb + '" alt="">'
           : '<span class="avatar-fallback">' + esc(initials(value)) + "</span>";
         return (
           '<a class="cell-player" href="/player/' + encodeURIComponent(value) + '">' +
@@ -90,6 +99,15 @@
     this.cols = [];
     this.rows = [];      // every row, as loaded
     this.view = [];      // indices into rows, after filter + sort
+
+    // Remote tables only: pages of the current query, by page number.
+    this.remote = false;
+    this.pages = {};
+    this.pending = {};
+    this.total = 0;      // rows matching the current query
+    this.fullTotal = 0;  // rows in the table, unfiltered
+    this.query = null;
+    this.generation = 0;
     this.sortIndex = -1;
     this.sortDesc = true;
     this.rowHeight = FALLBACK_ROW_H;
@@ -101,27 +119,28 @@
     this.root.innerHTML = '<div class="loading">Loading</div>';
   }
 
+  /* Sorted as it will first be shown, so a remote table's first page is the
+     one on screen. Endpoints that don't page ignore the parameters. */
+  DataTable.prototype.firstQuery = function () {
+    var first = { limit: PAGE };
+    if (this.defaultSort) first.sort = "-" + this.defaultSort;
+    return first;
+  };
+
   DataTable.prototype.load = function () {
     var self = this;
     if (this.loaded || this.loading) return Promise.resolve();
     this.loading = true;
 
-    return fetch(this.url)
-      .then(function (response) {
-        if (!response.ok) throw new Error("HTTP " + response.status);
-        return response.json();
-      })
+    return this.fetchJson(this.firstQuery())
       .then(function (payload) {
         self.cols = payload.cols;
-        self.rows = payload.rows;
         self.loaded = true;
         self.loading = false;
 
         self.colIndex = {};
         self.cols.forEach(function (col, i) { self.colIndex[col.key] = i; });
 
-        self.buildShell();
-
         var initial = self.defaultSort && self.colIndex[self.defaultSort] !== undefined
           ? self.colIndex[self.defaultSort]
           : -1;
@@ -129,6 +148,9 @@
           self.sortIndex = initial;
           self.sortDesc = true;
         }
+
+        self.adopt(payload);
+        self.buildShell();
         self.apply();
       })
       .catch(function (error) {
@@ -139,6 +161,127 @@
       });
   };
 
+  /* Takes the first page: the whole table when it fits, else the start of a
+     remote one. */
+  DataTable.prototype.adopt = function (payload) {
+    if (payload.total !== undefined && payload.total > payload.rows.length) {
+      this.remote = true;
+      this.total = this.fullTotal = payload.total;
+      this.query = this.remoteQuery();
+      this.pages = { 0: payload.rows };
+      this.pending = {};
+      this.generation += 1;
+    } else {
+      this.remote = false;
+      this.rows = payload.rows;
+    }
+  };
+
+  /* The server swapped in new data. Refetch what is on screen, keeping the
+     sort, filters and scroll position; the old rows stay up until the new
+     ones arrive. */
+  DataTable.prototype.refresh = function () {
+    var self = this;
+    if (!this.loaded) return;
+
+    if (this.remote) {
+      var pages = {};
+      for (var p = Math.floor((this.firstRendered || 0) / PAGE);
+           p <= Math.floor(Math.max(0, (this.lastRendered || 1) - 1) / PAGE); p++) {
+        if (this.pages[p]) pages[p] = this.pages[p];
+      }
+      this.generation += 1;
+      this.pending = {};
+      this.pages = pages;
+      Object.keys(pages).forEach(function (page) { self.fetchPage(Number(page)); });
+      this.paint(true);
+      return;
+    }
+
+    this.fetchJson(this.firstQuery())
+      .then(function (payload) {
+        var top = self.scroller.scrollTop;
+        self.adopt(payload);
+        if (self.remote) self.query = null;  // let apply() fetch for the filters
+        self.apply();
+        self.scroller.scrollTop = top;
+        self.paint(true);
+      })
+      .catch(function () { /* the previous rows stay up */ });
+  };
+
+  DataTable.prototype.fetchJson = function (params) {
+    var query = Object.keys(params).map(function (key) {
+      return encodeURIComponent(key) + "=" + encodeURIComponent(params[key]);
+    }).join("&");
+    var url = this.url + (query ? (this.url.indexOf("?") === -1 ? "?" : "&") + query : "");
+    return fetch(url).then(function (response) {
+      if (!response.ok) throw new Error("HTTP " + response.status);
+      return response.json();
+    });
+  };
+
+  /* -- remote paging ------------------------------------------------------ */
+
+  /* The current sort and filters as query parameters, the same filters
+     matches() applies locally. */
+  DataTable.prototype.remoteQuery = function () {
+    var params = {};
+    var f = this.filters;
+    if (this.sortIndex >= 0) {
+      params.sort = (this.sortDesc ? "-" : "") + this.cols[this.sortIndex].key;
+    }
+    if (f.query) params.q = f.query;
+    if (f.minGames > 0 && this.colIndex.games_played !== undefined) {
+      params["min.games_played"] = f.minGames;
+    }
+    if (f.activeOnly && this.colIndex.active_player !== undefined) {
+      params.active = 1;
+    }
+    return params;
+  };
+
+  DataTable.prototype.fetchPage = function (page) {
+    var self = this;
+    if (this.pending[page]) return;
+    this.pending[page] = true;
+
+    var generation = this.generation;
+    var params = Object.assign({ offset: page * PAGE, limit: PAGE }, this.query);
+
+    this.fetchJson(params)
+      .then(function (payload) {
+        // A newer sort or filter has replaced this query; drop its page.
+        if (generation !== self.generation) return;
+        delete self.pending[page];
+        self.pages[page] = payload.rows;
+        if (!self.filtered()) self.fullTotal = payload.total;
+        if (self.total !== payload.total) {
+          self.total = payload.total;
+          self.updateCount();
+        }
+        self.paint(true);
+      })
+      .catch(function () {
+        if (generation === self.generation) delete self.pending[page];
+      });
+  };
+
+  /* Whether the current remote query leaves rows out. */
+  DataTable.prototype.filtered = function () {
+    return Object.keys(this.query || {}).some(function (key) { return key !== "sort"; });
+  };
+
+  DataTable.prototype.rowAt = function (i) {
+    if (!this.remote) return this.rows[this.view[i]];
+    var rows = this.pages[Math.floor(i / PAGE)];
+    if (!rows) {
+      this.fetchPage(Math.floor(i / PAGE));
+      return null;
+    }
+    return rows[i % PAGE] || null;
+  };
+
   /* -- column visibility ------------------------------------------------- */
 
   /* Which columns a table hides is remembered per table, so a view built once
@@ -369,6 +512,11 @@
   };
 
   DataTable.prototype.apply = function () {
+    if (this.remote) {
+      this.applyRemote();
+      return;
+    }
+
     var self = this;
 
     this.view = [];
@@ -397,6 +545,41 @@
       });
     }
 
+    this.markSort();
+    this.updateCount();
+    this.scroller.scrollTop = 0;
+    this.paint(true);
+  };
+
+  DataTable.prototype.applyRemote = function () {
+    var query = this.remoteQuery();
+    if (JSON.stringify(query) !== JSON.stringify(this.query)) {
+      // Keep showing the old rows until the new first page arrives, rather
+      // than flashing an empty table.
+      this.generation += 1;
+      this.query = query;
+      this.pending = {};
+      var self = this;
+      var generation = this.generation;
+      this.fetchJson(Object.assign({ offset: 0, limit: PAGE }, query))
+        .then(function (payload) {
+          if (generation !== self.generation) return;
+          self.pages = { 0: payload.rows };
+          self.total = payload.total;
+          self.updateCount();
+          self.scroller.scrollTop = 0;
+          self.paint(true);
+        })
+        .catch(function () { /* the previous rows stay up */ });
+    }
+
+    this.markSort();
+    this.updateCount();
+    this.paint(true);
+  };
+
+  DataTable.prototype.markSort = function () {
+    var self = this;
     // Headers carry the absolute column index in data-i, since hiding columns
     // makes DOM position and column index diverge.
     this.root.querySelectorAll("thead th").forEach(function (th) {
@@ -407,19 +590,18 @@
       th.setAttribute("aria-sort",
         active ? (self.sortDesc ? "descending" : "ascending") : "none");
     });
+  };
 
+  DataTable.prototype.updateCount = function () {
+    var shown = this.remote ? this.total : this.view.length;
+    var all = this.remote ? this.fullTotal : this.rows.length;
     this.countEl.textContent =
-      this.view.length.toLocaleString() +
-      (this.view.length === this.rows.length
-        ? " rows"
-        : " of " + this.rows.length.toLocaleString() + " rows");
-
-    this.scroller.scrollTop = 0;
-    this.paint(true);
+      shown.toLocaleString() +
+      (shown === all ? " rows" : " of " + all.toLocaleString() + " rows");
   };
 
   DataTable.prototype.paint = function (force) {
-    var total = this.view.length;
+    var total = this.remote ? this.total : this.view.length;
 
     if (total === 0) {
       this.spacerTop.style.display = "none";
@@ -453,7 +635,13 @@
 
     var html = "";
     for (var i = first; i < last; i++) {
-      var row = this.rows[this.view[i]];
+      var row = this.rowAt(i);
+      if (!row) {
+        // Still on its way; holds the row's place until the page arrives.
+        html += '<tr class="row-pending"><td colspan="' + this.visible.length +
+          '">&nbsp;</td></tr>';
+        continue;
+      }
       html += "<tr>";
       for (var v = 0; v < this.visible.length; v++) {
         var c = this.visible[v];
@@ -498,6 +686,25 @@
     }
   };
 
+  /* Every row of the current view, in order. A remote table is fetched in
+     the largest pages the server allows. */
+  DataTable.prototype.allRows = function () {
+    var self = this;
+    if (!this.remote) {
+      return Promise.resolve(this.view.map(function (i) { return self.rows[i]; }));
+    }
+
+    var rows = [];
+    function next() {
+      var params = Object.assign({ offset: rows.length, limit: EXPORT_PAGE }, self.query);
+      return self.fetchJson(params).then(function (payload) {
+        rows = rows.concat(payload.rows);
+        return payload.rows.length && rows.length < payload.total ? next() : rows;
+      });
+    }
+    return next();
+  };
+
   DataTable.prototype.exportCsv = function () {
     var self = this;
 
@@ -507,24 +714,25 @@
       return '"' + self.cols[index].label + '"';
     }).join(",")];
 
-    this.view.forEach(function (rowIndex) {
-      var row = self.rows[rowIndex];
-      lines.push(self.visible.map(function (index) {
-        var value = row[index];
-        if (value === null || value === undefined) return "";
-        var text = String(value);
-        return /[",\n]/.test(text) ? '"' + text.replace(/"/g, '""') + '"' : text;
-      }).join(","));
-    });
+    this.allRows().then(function (rows) {
+      rows.forEach(function (row) {
+        lines.push(self.visible.map(function (index) {
+          var value = row[index];
+          if (value === null || value === undefined) return "";
+          var text = String(value);
+          return /[",\n]/.test(text) ? '"' + text.replace(/"/g, '""') + '"' : text;
+        }).join(","));
+      });
 
-    var blob = new Blob([lines.join("\n")], { type: "text/csv;charset=utf-8;" });
-    var link = document.createElement("a");
-    link.href = URL.createObjectURL(blob);
-    link.download = "naismith-nerds-" + this.name + ".csv";
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-    URL.revokeObjectURL(link.href);
+      var blob = new Blob([lines.join("\n")], { type: "text/csv;charset=utf-8;" });
+      var link = document.createElement("a");
+      link.href = URL.createObjectURL(blob);
+      link.download = "naismith-nerds-" + self.name + ".csv";
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      URL.revokeObjectURL(link.href);
+    });
   };
 
   window.NN = window.NN || {};
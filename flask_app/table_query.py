@@ -0,0 +1,223 @@
+"""
+Paging, sorting, filtering and column selection for the league tables.
+
+`/api/table/<name>` used to answer with every row and every column, and the
+table downloaded all of it before drawing a single row. Games, player days and
+opponents grow with every session, so first paint on those tabs kept getting
+slower. With any of the parameters below the endpoint answers one page instead:
+
+    offset, limit       the window of matching rows; limit is capped at MAX_LIMIT
+    sort                comma separated columns, "-" prefix for descending
+    cols                comma separated columns to return, in that order
+    q                   case-insensitive substring of any name, text or date
+    player              rows involving that player, in any player column
+    date_from, date_to  inclusive bounds on game_date, as YYYY-MM-DD
+    min.<col>, max.<col>  inclusive numeric bounds; percentages as 0-1
+    active              only players flagged active
+
+Filters and sorts mirror what the table does in the browser: the same columns
+are searched, missing values sort last either way, and ties keep the table's
+own order. The browser asks for a first page and, when that turns out to be
+the whole table, goes on sorting and filtering it locally as before.
+
+Queries run against the rounded frame, so a threshold compares against the
+value shown rather than one a few decimals off it.
+"""
+
+from datetime import date
+from typing import List, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+import polars as pl
+
+from flask_app.columns import type_for
+
+MAX_LIMIT = 1000
+
+_SEARCHED_TYPES = ("player", "text", "date")
+_NUMERIC_TYPES = ("int", "num", "pct", "signed")
+_TRUE = ("1", "true", "yes")
+
+# Parameters that switch the endpoint from the full table to a page of it.
+_QUERY_PARAMS = ("offset", "limit", "sort", "cols", "q", "player", "date_from", "date_to", "active")
+
+
+class QueryError(ValueError):
+    """Raised for a query that names unknown columns or malformed values."""
+
+
+def first_page_key(limit: int, sort: str = "") -> str:
+    """TableQuery.key of an unfiltered page from the top, sorted by `sort`:
+    what a table asks for when it first loads. Spelled out here so the warm-up
+    can name it without a frame to validate against."""
+    pairs = [("offset", 0), ("limit", limit), ("sort", sort), ("active", 0)]
+    return urlencode([(name, value) for name, value in pairs if value != ""])
+
+
+def is_query(args: Mapping[str, str]) -> bool:
+    return any(
+        name in _QUERY_PARAMS or name.startswith(("min.", "max.")) for name in args
+    )
+
+
+class TableQuery:
+    """One validated query against one table's columns."""
+
+    def __init__(self, args: Mapping[str, str], frame: pl.DataFrame):
+        self._types = {
+            name: type_for(name, dtype) for name, dtype in zip(frame.columns, frame.dtypes)
+        }
+        self.offset = _int(args.get("offset"), "offset", default=0, low=0)
+        self.limit = _int(
+            args.get("limit"), "limit", default=MAX_LIMIT, low=1, high=MAX_LIMIT
+        )
+        self.sort = self._parse_sort(args.get("sort", ""))
+        self.cols = self._parse_cols(args.get("cols", ""))
+        self.q = args.get("q", "").strip().lower()
+        self.player = args.get("player", "").strip()
+        self.date_from = _date(args.get("date_from"), "date_from")
+        self.date_to = _date(args.get("date_to"), "date_to")
+        self.active = args.get("active", "").lower() in _TRUE
+        self.bounds = self._parse_bounds(args)
+
+        if (self.date_from or self.date_to) and "game_date" not in self._types:
+            raise QueryError("this table has no game_date to filter on")
+        if self.active and "active_player" not in self._types:
+            raise QueryError("this table has no active_player to filter on")
+        if self.player and not self._player_columns() and "pairing" not in self._types:
+            raise QueryError("this table has no player column to filter on")
+
+    @property
+    def key(self) -> str:
+        """The query in canonical form: equal keys, equal results."""
+        pairs = [
+            ("offset", self.offset),
+            ("limit", self.limit),
+            ("sort", ",".join(("-" if desc else "") + col for col, desc in self.sort)),
+            ("cols", ",".join(self.cols)),
+            ("q", self.q),
+            ("player", self.player),
+            ("date_from", self.date_from or ""),
+            ("date_to", self.date_to or ""),
+            ("active", int(self.active)),
+        ]
+        pairs += [
+            (f"{side}.{col}", value) for (side, col), value in sorted(self.bounds.items())
+        ]
+        return urlencode([(name, value) for name, value in pairs if value != ""])
+
+    def run(self, frame: pl.DataFrame) -> Tuple[pl.DataFrame, int]:
+        """The requested page, and how many rows matched in total."""
+        predicates = self._predicates()
+        if predicates:
+            frame = frame.filter(pl.all_horizontal(predicates))
+        if self.sort:
+            frame = frame.sort(
+                [col for col, _desc in self.sort],
+                descending=[desc for _col, desc in self.sort],
+                nulls_last=True,
+                maintain_order=True,
+            )
+        page = frame.slice(self.offset, self.limit)
+        if self.cols:
+            page = page.select(self.cols)
+        return page, frame.height
+
+    # -- parsing -----------------------------------------------------------
+
+    def _column(self, name: str) -> str:
+        if name not in self._types:
+            raise QueryError(f"unknown column '{name}'")
+        return name
+
+    def _parse_sort(self, raw: str) -> List[Tuple[str, bool]]:
+        keys = []
+        for part in filter(None, (p.strip() for p in raw.split(","))):
+            desc = part.startswith("-")
+            keys.append((self._column(part.lstrip("-")), desc))
+        return keys
+
+    def _parse_cols(self, raw: str) -> List[str]:
+        cols = []
+        for part in filter(None, (p.strip() for p in raw.split(","))):
+            if self._column(part) not in cols:
+                cols.append(part)
+        return cols
+
+    def _parse_bounds(self, args: Mapping[str, str]) -> dict:
+        bounds = {}
+        for name, raw in args.items():
+            side, _dot, column = name.partition(".")
+            if side not in ("min", "max") or not column:
+                continue
+            if self._types.get(self._column(column)) not in _NUMERIC_TYPES:
+                raise QueryError(f"column '{column}' is not numeric")
+            try:
+                bounds[(side, column)] = float(raw)
+            except ValueError:
+                raise QueryError(f"{name} must be a number") from None
+        return bounds
+
+    # -- filtering ---------------------------------------------------------
+
+    def _player_columns(self) -> List[str]:
+        return [name for name, kind in self._types.items() if kind == "player"]
+
+    def _predicates(self) -> List[pl.Expr]:
+        predicates = []
+
+        if self.q:
+            searched = [
+                pl.col(name).cast(pl.Utf8).str.to_lowercase().str.contains(self.q, literal=True)
+                for name, kind in self._types.items()
+                if kind in _SEARCHED_TYPES
+            ]
+            if not searched:
+                return [pl.lit(False)]
+            predicates.append(pl.any_horizontal(searched).fill_null(False))
+
+        if self.player:
+            involved = [pl.col(name) == self.player for name in self._player_columns()]
+            if "pairing" in self._types:
+                involved.append(
+                    pl.col("pairing").str.split(" - ").list.contains(self.player)
+                )
+            predicates.append(pl.any_horizontal(involved).fill_null(False))
+
+        if self.date_from:
+            predicates.append(pl.col("game_date") >= self.date_from)
+        if self.date_to:
+            predicates.append(pl.col("game_date") <= self.date_to)
+
+        if self.active:
+            predicates.append(pl.col("active_player").fill_null(False))
+
+        for (side, column), value in self.bounds.items():
+            if side == "min":
+                predicates.append(pl.col(column) >= value)
+            else:
+                predicates.append(pl.col(column) <= value)
+
+        return predicates
+
+
+def _int(raw: Optional[str], name: str, default: int, low: int, high: Optional[int] = None) -> int:
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise QueryError(f"{name} must be a whole number") from None
+    if value < low or (high is not None and value > high):
+        bound = f"between {low} and {high}" if high is not None else f"at least {low}"
+        raise QueryError(f"{name} must be {bound}")
+    return value
+
+
+def _date(raw: Optional[str], name: str) -> Optional[str]:
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw).isoformat()
+    except ValueError:
+        raise QueryError(f"{name} must be a date, YYYY-MM-DD") from None
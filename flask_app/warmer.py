@@ -0,0 +1,108 @@
+"""
+Pre-builds cached payloads for a new dataset before it is swapped in.
+
+After a swap every cached payload belongs to the old version, so without this
+the first visitors to each tab paid to rebuild it. DataStore's swap worker
+calls `warm()` with the incoming dataset and the version it will be published
+under, and only publishes once the warm-up is done. Requests keep being
+answered from the old version, and its cache, the whole time. A warm-up stops
+as soon as a later swap arrives, so back-to-back reloads never queue up
+warm-ups of data no one will be served.
+
+What gets built: the eight league tables, the search index, the charts, and
+the per-player bundles for the players whose pages are opened most. The
+build's row manifest is written too, so clients can sync from it later (see
+delta.py). Views are
+counted by the player page route. The counts live in memory and reset with the
+process, which is fine: they only decide what to build ahead of time.
+
+The warm-up runs on the swap worker, never on the thread that swapped, so it
+holds no request. At boot the initial dataset is warmed on a thread of its
+own, which after a restart mostly means reading payloads back from the disk
+tier.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from flask_app import api
+from flask_app.delta import build_id
+from flask_app.payload_cache import namespace_for
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_PLAYERS = 25
+
+
+class CacheWarmer:
+    def __init__(self, cache, store, top_players: int = DEFAULT_TOP_PLAYERS, manifests=None):
+        self._cache = cache
+        self._store = store
+        self._manifests = manifests
+        self._top_players = top_players
+        self._views = Counter()
+        self._views_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_view(self, player_name: str) -> None:
+        with self._views_lock:
+            self._views[player_name] += 1
+
+    def most_viewed(self, data) -> list:
+        """The most opened player pages that still exist in `data`."""
+        known = set(data.player_data["player"].to_list())
+        with self._views_lock:
+            ranked = [name for name, _count in self._views.most_common()]
+        return [name for name in ranked if name in known][: self._top_players]
+
+    def warm(self, data, version: int) -> None:
+        """Build every warmable payload for `data` under `version`.
+
+        A payload that fails to build is logged and skipped; the route will
+        try again, and report the error, when someone actually asks for it.
+        """
+        started = time.time()
+        payloads = api.league_payloads()
+        for name in self.most_viewed(data):
+            payloads.update(api.player_payloads(name))
+
+        namespace = namespace_for(data)
+        built = 0
+        for key, build in payloads.items():
+            if self._store.superseded(version):
+                logger.info("Warm-up for version %d superseded", version)
+                return
+            try:
+                self._cache.prebuild(
+                    key, version, lambda build=build: build(data), namespace=namespace
+                )
+                built += 1
+            except Exception:
+                logger.exception("Warming %s failed", key)
+
+        build = build_id(data)
+        if self._manifests is not None and build:
+            try:
+                self._manifests.ensure(build, lambda: api.row_manifest(data))
+            except Exception:
+                logger.exception("Writing the row manifest for %s failed", build)
+
+        logger.info(
+            "Warmed %d payloads for version %d in %.2fs",
+            built,
+            version,
+            time.time() - started,
+        )
+
+    def start(self) -> None:
+        """Warm the dataset already being served, off the boot path."""
+        if self._thread is not None:
+            return
+        data, version = self._store.snapshot()
+        self._thread = threading.Thread(
+            target=self.warm, args=(data, version), name="cache-warmer", daemon=True
+        )
+        self._thread.start()
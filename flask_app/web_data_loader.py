@@ -1,6 +1,6 @@
 import polars as pl
 
-from collective_bball.paths import player_thumb_path
+from collective_bball.player_images import player_images
 
 
 def format_stats_for_site(df: pl.DataFrame, does_player_image_exist_row=False):
@@ -132,7 +132,7 @@ def format_stats_for_site(df: pl.DataFrame, does_player_image_exist_row=False):
 
     if does_player_image_exist_row:
         for row in output_dict:
-            row["has_img"] = player_thumb_path(row["Player"]).exists()
+            row["has_img"] = player_images.has_thumb(row["Player"])
 
     return output_dict
 
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings shared by every launcher: Dockerfile, fly.toml, Procfile and
+render.yaml all start gunicorn from the repo root, where it reads this file.
+Flags on a command line still win.
+
+Threads, not processes. The dataset is held in memory and swapped in place, so
+a second worker would double the memory and refresh the data twice; a single
+sync worker, though, had one thread, and an open event stream (see
+flask_app/events.py) would have taken it for minutes at a time. gthread serves
+each request on a thread of one process, so streams hold a few threads and the
+rest keep answering. The app's shared state was already built for concurrent
+requests: the payload cache is single-flight and the dataset swap is atomic.
+"""
+
+import os
+
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 12))
@@ -0,0 +1,102 @@
+"""
+Times the table serializers against the per-row encoder they replaced.
+
+    python -m tools.bench_serialize                 # the served artifacts
+    python -m tools.bench_serialize    --scale 10   # each frame repeated 10x
+
+Reads the artifacts the app would boot from, so build them first. Every
+encoder's output is parsed back and compared with the reference before it is
+timed; a mismatch is reported and fails the run.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import polars as pl
+
+from collective_bball import artifacts
+from flask_app import api
+from flask_app.columns import round_floats, spec_for
+
+
+def serialize_rows(df: pl.DataFrame) -> bytes:
+    """The original encoder: a Python list per row, then json.dumps."""
+    df = round_floats(df)
+    payload = {
+        "cols": spec_for(df),
+        "rows": [list(row) for row in df.iter_rows()],
+        "count": df.height,
+    }
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def frames(data, scale: int) -> dict:
+    named = {"player_games": data.player_games}
+    named.update((name, build(data)) for name, build in api.DATASETS.items())
+    if scale > 1:
+        named = {name: pl.concat([df] * scale).rechunk() for name, df in named.items()}
+    return named
+
+
+def best_of(fn, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _same(a, b) -> bool:
+    # The reference prints NaN where the columnar encoders print null.
+    if isinstance(a, float) and math.isnan(a):
+        return b is None
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-6)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(map(_same, a, b))
+    return a == b
+
+
+def matches(reference: bytes, rows: bytes, columns: bytes) -> bool:
+    expected = json.loads(reference)
+    got = json.loads(rows)
+    by_column = json.loads(columns)
+    transposed = [list(row) for row in zip(*by_column["data"].values())]
+    return (
+        got["cols"] == expected["cols"] == by_column["cols"]
+        and got["count"] == expected["count"] == by_column["count"]
+        and _same(expected["rows"], got["rows"])
+        and _same(expected["rows"], transposed)
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="repeat each frame N times")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args(argv)
+
+    data = artifacts.load()
+    failed = False
+    print(f"{'frame':<14}{'rows':>9}{'per-row':>11}{'rows':>10}{'columns':>10}{'speedup':>9}")
+    for name, df in frames(data, args.scale).items():
+        if not matches(serialize_rows(df), api._serialize(df), api._serialize_columns(df)):
+            print(f"{name}: output differs from the reference encoder")
+            failed = True
+            continue
+        reference = best_of(lambda: serialize_rows(df), args.repeat)
+        rows = best_of(lambda: api._serialize(df), args.repeat)
+        columns = best_of(lambda: api._serialize_columns(df), args.repeat)
+        print(
+            f"{name:<14}{df.height:>9,}{reference * 1000:>9.1f}ms{rows * 1000:>8.1f}ms"
+            f"{columns * 1000:>8.1f}ms{reference / rows:>8.1f}x"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())